@@ -1,20 +1,56 @@
 import os
+import re
+import select
+import asyncio
+import atexit
+import base64
+import copy
+import hashlib
+import csv
+import io
+import json
 import logging
-from datetime import datetime, timedelta
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional
 
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError
 from dotenv import load_dotenv
 import bcrypt
 
-from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
 
+try:
+    import psycopg
+    from psycopg.rows import dict_row, tuple_row
+    from psycopg_pool import AsyncConnectionPool, PoolTimeout
+except ImportError:  # only needed when DB_BACKEND=async
+    psycopg = None
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
 
 # Load environment variables
 load_dotenv()
@@ -26,17 +62,343 @@ def get_env_list(name: str, default: str = ""):
 
 
 # Setup logging
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """Rotating log file that only reaches the disk when the listener drains.
+
+    StreamHandler flushes after every record; here that is a no-op and the
+    queue listener calls drain() once the queue is empty, so a burst of
+    records costs one write. Rollover and close still flush the buffer.
+    """
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        super().flush()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: records that don't fit in the queue are dropped and counted."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Resolve the arguments and traceback now; formatting is left to the file handler
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """Writes queued records on a background thread, draining the file handlers when idle."""
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                getattr(handler, "drain", handler.flush)()
+        return self.queue.get(block)
+
+
 log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(
-    level=getattr(logging, log_level, logging.INFO),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    filename=os.getenv("LOG_FILE", "library.log"),
+log_file_handler = BufferedRotatingFileHandler(
+    os.getenv("LOG_FILE", "library.log"),
+    maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+    encoding="utf-8",
 )
+if os.getenv("LOG_FORMAT", "json").lower() == "json":
+    log_file_handler.setFormatter(JsonFormatter())
+else:
+    log_file_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+log_handler = DroppingQueueHandler(queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+logging.basicConfig(level=getattr(logging, log_level, logging.INFO), handlers=[log_handler])
+log_listener = DrainingQueueListener(log_handler.queue, log_file_handler)
+log_listener.start()
+# Registered after logging's own shutdown hook, so it runs first and nothing queued is lost
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
+# Metrics, exposed in the Prometheus text format on /metrics
+def _format_labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter with one value per combination of label values."""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    """Bucketed observations with one series per combination of label values.
+
+    Each series keeps a count per bucket (the last one is +Inf) and the sum
+    of the observed values; buckets are only made cumulative when rendered.
+    """
+
+    def __init__(self, name, help, labels=(), buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, values in series:
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                total += count
+                labels = _format_labels(self.labels + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {total}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {values[-1]}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+def _render_gauges(prefix, stats, source):
+    lines = []
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)):
+            continue
+        name = prefix + re.sub(r"[^a-zA-Z0-9_]", "_", key)
+        lines += [f"# HELP {name} {key} from {source}", f"# TYPE {name} gauge", f"{name} {float(value)}"]
+    return lines
+
+
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+request_duration = Histogram(
+    "library_http_request_duration_seconds", "Time spent handling HTTP requests, until the last body chunk",
+    ("method", "route", "status"),
+)
+query_duration = Histogram(
+    "library_db_query_duration_seconds", "Time spent running a query on a checked-out connection",
+    ("query",), DB_BUCKETS,
+)
+pool_wait = Histogram(
+    "library_db_pool_wait_seconds", "Time spent waiting for a pooled connection", buckets=DB_BUCKETS,
+)
+query_errors = Counter("library_db_query_errors_total", "Queries that raised a database error", ("query",))
+app_errors = Counter("library_errors_total", "Requests that failed with a server-side error", ("type",))
+
+# Queries taking longer than this are logged with their SQL (0 disables)
+slow_query_ms = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# (label, seconds) of every query run by the current request, when it asked for a profile
+query_profile: ContextVar[Optional[list]] = ContextVar("query_profile", default=None)
+
+
+def _params_shape(params):
+    """Parameter types without their values, which may be emails or hashes."""
+    if params is None:
+        return "none"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(
+        f"{type(value).__name__}[{len(value)}]" if isinstance(value, (list, tuple)) else type(value).__name__
+        for value in params
+    ) + ")"
+
+
+def record_query(label, query, params, duration, rows):
+    """Feed a finished query to the metrics, the request profile and the slow-query log."""
+    query_duration.observe(duration, label)
+    profile = query_profile.get()
+    if profile is not None:
+        profile.append((label, duration))
+    if slow_query_ms and duration * 1000 >= slow_query_ms:
+        logger.warning(
+            f"Slow query {label}: {duration * 1000:.1f} ms, {rows} rows, params {_params_shape(params)}: "
+            f"{' '.join(query.split())}"
+        )
+
+
+class MetricsMiddleware:
+    """Times every HTTP request, labelled by its route template.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware so streamed
+    responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Unmatched paths share one label so scanners can't blow up the series count
+            route = scope.get("route")
+            request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            )
+
+
+class QueryProfileMiddleware:
+    """Answer requests sent with `X-Debug-Profile: 1` with their query count and DB time.
+
+    The result goes in an X-Debug-Profile response header, e.g.
+    `queries=2; db_ms=3.41; labels=current_user,user_labs`. Streamed
+    responses only count the queries run before their headers are sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or dict(scope["headers"]).get(b"x-debug-profile") not in (b"1", b"true"):
+            await self.app(scope, receive, send)
+            return
+
+        profile = []
+        token = query_profile.set(profile)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                summary = (
+                    f"queries={len(profile)}; db_ms={sum(d for _, d in profile) * 1000:.2f}; "
+                    f"labels={','.join(label for label, _ in profile)}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"x-debug-profile", summary.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            query_profile.reset(token)
+
+
+# JSON encoding
+def _json_default(value):
+    """Types neither encoder handles natively, encoded the way jsonable_encoder does."""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content) -> bytes:
+    """Encode rows straight from the database (dicts, dates, Decimals) to JSON bytes.
+
+    Uses orjson when installed, which handles dates and dict subclasses such
+    as RealDictRow natively, otherwise the stdlib encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by dump_json.
+
+    FastAPI still runs jsonable_encoder over whatever an endpoint returns, so
+    endpoints returning many rows build this response themselves to skip it.
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up the pool so the first requests don't pay for connection setup
+    try:
+        await db.open()
+    except (psycopg2.Error, PoolError) as e:
+        logger.warning(f"Could not pre-open database connections: {e}")
+    password_hasher.start()
+    if cache.enabled and os.getenv("CACHE_LISTEN", "true").lower() == "true":
+        cache_listener.start()
+    yield
+    cache_listener.stop()
+    password_hasher.shutdown()
+    await db.close()
+
+
 # Create FastAPI app
-app = FastAPI(title="Library Management API")
+app = FastAPI(title="Library Management API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Sessions (must be before CORS)
 secret_key = os.getenv("SECRET_KEY", "change-me")
@@ -50,8 +412,227 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Debug-Profile"],
 )
 
+# Per-request query profile on demand
+app.add_middleware(QueryProfileMiddleware)
+
+# Request metrics (outermost, so sessions and CORS are timed too)
+if os.getenv("METRICS_ENABLED", "true").lower() == "true":
+    app.add_middleware(MetricsMiddleware)
+
+
+# Database connection pool
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used", "uses")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections.
+
+    Idle connections are pinged before reuse once they have been idle for
+    `health_check_after` seconds, and are recycled after `max_uses` checkouts
+    or `max_lifetime` seconds (0 disables either limit).
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0,
+                 max_uses=0, max_lifetime=0.0, health_check_after=30.0):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._counters = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "discarded": 0,
+        }
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def open(self):
+        """Open connections until the pool holds `min_size` of them."""
+        with self._cond:
+            self._closed = False
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        for opened in range(max(missing, 0)):
+            try:
+                entry = self._new_entry()
+            except Exception:
+                with self._cond:
+                    self._size -= missing - opened
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def close(self):
+        """Close idle connections; checked-out ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    @contextmanager
+    def connection(self):
+        entry = self._checkout()
+        discard = False
+        try:
+            yield entry.conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self._checkin(entry, discard)
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._counters["checkouts"]
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                **self._counters,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+                "wait_ratio": round(self._counters["waits"] / checkouts, 4) if checkouts else 0.0,
+            }
+
+    def _new_entry(self):
+        entry = _PooledConnection(self._connect())
+        with self._cond:
+            self._counters["created"] += 1
+        return entry
+
+    def _checkout(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        entry = None
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolError(f"connection pool exhausted ({self.max_size} connections in use)")
+                if not waited:
+                    self._counters["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._counters["checkouts"] += 1
+            if waited:
+                wait_time = time.monotonic() - started
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        try:
+            if entry is not None and not self._reusable(entry):
+                self._close_quietly(entry.conn)
+                entry = None
+            if entry is None:
+                entry = self._new_entry()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        entry.uses += 1
+        return entry
+
+    def _checkin(self, entry, discard=False):
+        conn = entry.conn
+        if not discard and not conn.closed and conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        expired = self._expired(entry, time.monotonic())
+        with self._cond:
+            self._in_use -= 1
+            if discard or expired or conn.closed or self._closed:
+                self._size -= 1
+                self._counters["recycled" if expired and not discard else "discarded"] += 1
+                keep = False
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(conn)
+
+    def _expired(self, entry, now):
+        if self.max_uses and entry.uses >= self.max_uses:
+            return True
+        return bool(self.max_lifetime) and now - entry.created_at >= self.max_lifetime
+
+    def _reusable(self, entry):
+        now = time.monotonic()
+        if self._expired(entry, now):
+            with self._cond:
+                self._counters["recycled"] += 1
+            return False
+        if not entry.conn.closed and now - entry.last_used < self.health_check_after:
+            return True
+        try:
+            with entry.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            with self._cond:
+                self._counters["discarded"] += 1
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+def columnar_result(description, rows):
+    """Column names once, then each row as a tuple in the same order."""
+    return {"columns": [column[0] for column in description], "rows": rows}
+
 
 # Database connection manager
 class Database:
@@ -61,6 +642,15 @@ class Database:
         self.database = os.getenv("DB_NAME", "library_db")
         self.user = os.getenv("DB_USER", "postgres")
         self.password = os.getenv("DB_PASSWORD", "")
+        self.pool = ConnectionPool(
+            self._pooled_connection,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            max_uses=int(os.getenv("DB_POOL_MAX_USES", "10000")),
+            max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            health_check_after=float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30")),
+        )
 
     def get_connection(self):
         return psycopg2.connect(
@@ -72,31 +662,725 @@ class Database:
             cursor_factory=RealDictCursor,
         )
 
-    def execute_query(self, query, params=None, fetch_one: bool = False):
+    def _pooled_connection(self):
+        # Every statement runs in its own transaction, so pooled connections
+        # never sit idle in a transaction between checkouts.
         conn = self.get_connection()
-        cursor = conn.cursor()
+        conn.autocommit = True
+        return conn
+
+    def execute_query(self, query, params=None, fetch_one: bool = False, label: str = "unlabeled",
+                      columnar: bool = False):
+        """Run a query on a pooled connection; `label` keys its metrics and slow-query log line.
+
+        With `columnar`, rows are fetched as plain tuples and returned as
+        {"columns": [...], "rows": [...]}, so column names are not repeated
+        in a dict per row.
+        """
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            acquired = time.perf_counter()
+            pool_wait.observe(acquired - started)
+            rows = None
+            try:
+                with conn.cursor(cursor_factory=psycopg2.extensions.cursor if columnar else None) as cursor:
+                    cursor.execute(query, params)
+                    rows = cursor.rowcount
+                    if cursor.description is None:
+                        return cursor.rowcount
+                    if columnar:
+                        return columnar_result(cursor.description, cursor.fetchall())
+                    return cursor.fetchone() if fetch_one else cursor.fetchall()
+            except psycopg2.Error:
+                query_errors.inc(label)
+                raise
+            finally:
+                record_query(label, query, params, time.perf_counter() - acquired, rows)
+
+    def execute_function(self, function_name, params=None, columnar: bool = False):
+        placeholders = ", ".join(["%s"] * len(params)) if params else ""
+        query = f"SELECT * FROM library.{function_name}({placeholders})"
+        return self.execute_query(query, params, label=function_name, columnar=columnar)
+
+    def stream_query(self, query, params=None, batch_size: int = 1000, label: str = "unlabeled",
+                     describe: bool = False):
+        """Yield lists of rows from a server-side cursor, one round trip per batch.
+
+        With `describe`, the list of column names is yielded first, even when
+        the query returns no rows. The query metric covers the whole stream,
+        including the time the client takes to consume it.
+        """
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            acquired = time.perf_counter()
+            pool_wait.observe(acquired - started)
+            # Named cursors only live inside a transaction
+            conn.autocommit = False
+            streamed = 0
+            try:
+                with conn.cursor(name="stream") as cursor:
+                    cursor.execute(query, params)
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        # A named cursor is only described once the first FETCH ran
+                        if describe:
+                            yield [column[0] for column in cursor.description]
+                            describe = False
+                        if not rows:
+                            break
+                        streamed += len(rows)
+                        yield rows
+            except psycopg2.Error:
+                query_errors.inc(label)
+                raise
+            finally:
+                record_query(label, query, params, time.perf_counter() - acquired, streamed)
+                conn.rollback()
+                conn.autocommit = True
+
+
+class ThreadedDatabase:
+    """Async facade running the blocking Database on Starlette's threadpool."""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    async def open(self):
+        await run_in_threadpool(self.database.pool.open)
+
+    async def close(self):
+        await run_in_threadpool(self.database.pool.close)
+
+    def pool_stats(self):
+        return self.database.pool.stats()
+
+    def get_connection(self):
+        """A dedicated psycopg2 connection outside the pool (see CacheInvalidationListener)."""
+        return self.database.get_connection()
+
+    async def execute_query(self, query, params=None, fetch_one: bool = False, label: str = "unlabeled",
+                            columnar: bool = False):
+        return await run_in_threadpool(self.database.execute_query, query, params, fetch_one, label, columnar)
+
+    async def execute_function(self, function_name, params=None, columnar: bool = False):
+        return await run_in_threadpool(self.database.execute_function, function_name, params, columnar)
+
+    async def stream_query(self, query, params=None, batch_size: int = 1000, label: str = "unlabeled",
+                           describe: bool = False):
+        batches = self.database.stream_query(query, params, batch_size, label, describe)
         try:
-            cursor.execute(query, params)
-            if query.strip().upper().startswith("SELECT"):
-                return cursor.fetchone() if fetch_one else cursor.fetchall()
-            else:
-                conn.commit()
-                return cursor.rowcount
+            while True:
+                rows = await run_in_threadpool(next, batches, None)
+                if rows is None:
+                    break
+                yield rows
         finally:
-            cursor.close()
-            conn.close()
+            await run_in_threadpool(batches.close)
 
-    def execute_function(self, function_name, params=None):
+
+class AsyncDatabase:
+    """Native asyncio database layer built on psycopg 3 and psycopg_pool.
+
+    Exposes the same execute_query/execute_function surface as Database so
+    the endpoints don't care which backend is configured.
+    """
+
+    def __init__(self):
+        if psycopg is None:
+            raise RuntimeError("DB_BACKEND=async requires the 'psycopg[binary,pool]' package")
+        self.host = os.getenv("DB_HOST", "localhost")
+        self.port = int(os.getenv("DB_PORT", "5432"))
+        self.database = os.getenv("DB_NAME", "library_db")
+        self.user = os.getenv("DB_USER", "postgres")
+        self.password = os.getenv("DB_PASSWORD", "")
+        self.pool = self._new_pool()
+
+    def _new_pool(self):
+        return AsyncConnectionPool(
+            psycopg.conninfo.make_conninfo(
+                host=self.host,
+                port=self.port,
+                dbname=self.database,
+                user=self.user,
+                password=self.password,
+            ),
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            check=AsyncConnectionPool.check_connection,
+            kwargs={"autocommit": True, "row_factory": dict_row},
+            open=False,
+        )
+
+    async def open(self):
+        try:
+            await self.pool.open(wait=True, timeout=self.pool.timeout)
+        except PoolTimeout as e:
+            raise PoolError(str(e)) from e
+
+    async def close(self):
+        await self.pool.close()
+        # A closed psycopg pool cannot be reopened; the next open() gets a fresh one
+        self.pool = self._new_pool()
+
+    def pool_stats(self):
+        return self.pool.get_stats()
+
+    def get_connection(self):
+        """A dedicated psycopg2 connection outside the pool (see CacheInvalidationListener)."""
+        return psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            cursor_factory=RealDictCursor,
+        )
+
+    async def execute_query(self, query, params=None, fetch_one: bool = False, label: str = "unlabeled",
+                            columnar: bool = False):
+        started = time.perf_counter()
+        try:
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                pool_wait.observe(acquired - started)
+                rows = None
+                try:
+                    async with conn.cursor(row_factory=tuple_row if columnar else None) as cursor:
+                        await cursor.execute(query, params)
+                        rows = cursor.rowcount
+                        if cursor.description is None:
+                            return cursor.rowcount
+                        if columnar:
+                            return columnar_result(cursor.description, await cursor.fetchall())
+                        return await cursor.fetchone() if fetch_one else await cursor.fetchall()
+                except psycopg.Error:
+                    query_errors.inc(label)
+                    raise
+                finally:
+                    record_query(label, query, params, time.perf_counter() - acquired, rows)
+        except PoolTimeout as e:
+            raise PoolError(str(e)) from e
+
+    async def execute_function(self, function_name, params=None, columnar: bool = False):
         placeholders = ", ".join(["%s"] * len(params)) if params else ""
         query = f"SELECT * FROM library.{function_name}({placeholders})"
-        return self.execute_query(query, params)
+        return await self.execute_query(query, params, label=function_name, columnar=columnar)
+
+    async def stream_query(self, query, params=None, batch_size: int = 1000, label: str = "unlabeled",
+                           describe: bool = False):
+        """Yield lists of rows from a server-side cursor, one round trip per batch.
+
+        With `describe`, the list of column names is yielded first.
+        """
+        started = time.perf_counter()
+        try:
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                pool_wait.observe(acquired - started)
+                streamed = 0
+                try:
+                    async with conn.transaction():
+                        async with conn.cursor(name="stream") as cursor:
+                            await cursor.execute(query, params)
+                            while True:
+                                rows = await cursor.fetchmany(batch_size)
+                                if describe:
+                                    yield [column[0] for column in cursor.description]
+                                    describe = False
+                                if not rows:
+                                    break
+                                streamed += len(rows)
+                                yield rows
+                except psycopg.Error:
+                    query_errors.inc(label)
+                    raise
+                finally:
+                    record_query(label, query, params, time.perf_counter() - acquired, streamed)
+        except PoolTimeout as e:
+            raise PoolError(str(e)) from e
+
+
+# DB_BACKEND=sync keeps psycopg2 on the threadpool, DB_BACKEND=async uses psycopg 3
+if os.getenv("DB_BACKEND", "sync").lower() == "async":
+    db = AsyncDatabase()
+else:
+    db = ThreadedDatabase(Database())
+
+
+# In-process response cache
+class _CacheEntry:
+    __slots__ = ("body", "expires_at", "tags")
+
+    def __init__(self, body, expires_at, tags):
+        self.body = body
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class ResponseCache:
+    """LRU cache of serialized JSON response bodies.
+
+    Entries expire after their own TTL, the cache is bounded by the total
+    size of the bodies in bytes, and every entry carries tags so writes can
+    invalidate whatever was derived from the data they touched.
+    """
+
+    def __init__(self, max_bytes, enabled=True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._size = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.body
+
+    def set(self, key, body, ttl, tags=()):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(body, time.monotonic() + ttl, tuple(tags))
+            self._size += len(body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def invalidate(self, *tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            self._counters["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+cache = ResponseCache(
+    max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    enabled=os.getenv("CACHE_ENABLED", "true").lower() == "true",
+)
+
+
+def _endpoint_key(endpoint, kwargs):
+    return (endpoint.__name__,) + tuple(
+        sorted((k, v) for k, v in kwargs.items() if isinstance(v, (str, int, float, bool, type(None))))
+    )
+
+
+# Data versions the current request's ETag was built from (set by `conditional`)
+data_stamp: ContextVar[str] = ContextVar("data_stamp", default="")
+
+
+def cached(ttl: float, tags=()):
+    """Cache the JSON body of a GET endpoint.
+
+    The key is the endpoint name plus its scalar parameters, so only use it
+    on endpoints whose response does not depend on the session. `tags` is a
+    tuple or a callable receiving the endpoint's keyword arguments.
+
+    Under `conditional` the key also holds the data versions, so a body is
+    never served with the ETag of newer data while its invalidation
+    notification is still on the way.
+    """
+
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            key = _endpoint_key(endpoint, kwargs) + (data_stamp.get(),)
+            body = cache.get(key)
+            if body is not None:
+                return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            body = dump_json(result)
+            cache.set(key, body, ttl, tags(kwargs) if callable(tags) else tags)
+            return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+        return wrapper
+
+    return decorator
+
+
+def _etag_matches(if_none_match, etag):
+    """Weak comparison, as If-None-Match requires."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class DataVersions:
+    """In-process copy of library.data_version.
+
+    CacheInvalidationListener loads it after each LISTEN and applies the
+    versions the data_version trigger announces. While the listener is not
+    connected the copy is unknown, and `stamp` returns None.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = None
+
+    def load(self, rows):
+        with self._lock:
+            self._versions = {row["name"]: row["version"] for row in rows}
+
+    def reset(self):
+        with self._lock:
+            self._versions = None
+
+    def update(self, name, version):
+        with self._lock:
+            if self._versions is not None:
+                # Notifications arrive in commit order; never step back anyway
+                self._versions[name] = max(version, self._versions.get(name, version))
+
+    def stamp(self, names):
+        with self._lock:
+            if self._versions is None:
+                return None
+            return ",".join(f"{name}:{self._versions[name]}" for name in sorted(names) if name in self._versions)
+
+
+data_versions = DataVersions()
+
+
+def conditional(*versions):
+    """Answer a GET with a strong ETag and 304 Not Modified when it matches.
+
+    The ETag hashes the endpoint, its scalar parameters and the named rows
+    of library.data_version, which triggers bump on every write to the
+    underlying tables. The versions come from memory while the cache
+    listener is connected, so a matching If-None-Match costs no query at
+    all; otherwise they are read with one primary key lookup. The endpoint
+    must take a `request: Request` parameter, and like `cached` must not
+    depend on the session.
+    """
+
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            # Read before the data: an ETag may be older than the body, never newer.
+            # The in-memory versions only move once the writing transaction committed.
+            stamp = data_versions.stamp(versions)
+            if stamp is None:
+                rows = await db.execute_query(
+                    "SELECT name, version FROM library.data_version WHERE name = ANY(%s) ORDER BY name",
+                    (list(versions),),
+                    label="data_version",
+                )
+                stamp = ",".join(f"{row['name']}:{row['version']}" for row in rows)
+            digest = hashlib.blake2b(repr((_endpoint_key(endpoint, kwargs), stamp)).encode(), digest_size=16)
+            etag = f'"{digest.hexdigest()}"'
+            # no-cache: clients keep the body but revalidate it on every use
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if _etag_matches(kwargs["request"].headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+
+            token = data_stamp.set(stamp)
+            try:
+                result = await endpoint(*args, **kwargs)
+            finally:
+                data_stamp.reset(token)
+            response = result if isinstance(result, Response) else FastJSONResponse(result)
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class CacheInvalidationListener:
+    """Drops cache entries when any worker (or any other client) changes data.
+
+    Triggers on the borrowing, copy, publication and proposal tables NOTIFY
+    the library_cache channel; this thread LISTENs on a dedicated connection
+    and maps each payload to cache tags. New data versions arrive on the same
+    channel and are kept in `versions`. After a reconnect the whole cache is
+    cleared and the versions reloaded, since notifications sent while
+    disconnected are lost.
+    """
+
+    channel = "library_cache"
+
+    def __init__(self, cache: ResponseCache, connect, versions: DataVersions):
+        self.cache = cache
+        self.versions = versions
+        self._connect = connect
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.versions.reset()
+
+    def handle(self, payload: str):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed cache notification: {payload!r}")
+            return
+        if "data_version" in change:
+            self.versions.update(change["data_version"], change["version"])
+            return
+        table = change.get("table")
+        ids = change.get("ids")
+        details = [f"publication:{id}" for id in ids] if ids else ["publications"]
+
+        if table in ("borrowing", "publication_copy"):
+            self.cache.invalidate("stats", "labs", *details)
+        elif table == "publication":
+            self.cache.invalidate("stats", "catalog", *details)
+        elif table == "proposed_publication":
+            self.cache.invalidate("stats")
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                    # Loaded after LISTEN, so no bump can fall between the two
+                    cursor.execute("SELECT name, version FROM library.data_version")
+                    self.versions.load(cursor.fetchall())
+                self.cache.clear()
+                backoff = 1.0
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.handle(conn.notifies.pop(0).payload)
+            except Exception as e:
+                # Anything escaping here would end the thread and leave the
+                # cache unwatched, so every failure is treated as a disconnect
+                if isinstance(e, psycopg2.Error):
+                    logger.warning(f"Cache listener disconnected: {e}")
+                else:
+                    logger.exception("Cache listener failed")
+                self.versions.reset()
+                self.cache.clear()
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+# Shares the configured backend's settings; the LISTEN connection itself
+# stays out of the pool since it is held for the life of the process
+cache_listener = CacheInvalidationListener(cache, db.get_connection, data_versions)
+
+
+async def stream_json_array(batches):
+    """Encode row batches as one JSON array without materializing the result."""
+    yield b"["
+    first = True
+    async for rows in batches:
+        # Encode the whole batch at once and drop its brackets
+        chunk = dump_json(rows)[1:-1]
+        if not chunk:
+            continue
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+async def stream_csv(batches):
+    """Encode row batches as CSV; expects the column names first (stream_query's `describe`)."""
+    header = None
+    async for rows in batches:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header is None:
+            # Written even when no rows follow, so an empty export still has its columns
+            header = rows
+            writer.writerow(header)
+        else:
+            writer.writerows([[row[column] for column in header] for row in rows])
+        yield buffer.getvalue().encode()
+
+
+async def stream_ndjson(batches):
+    """Encode row batches as newline-delimited JSON, one object per line."""
+    async for rows in batches:
+        yield b"".join(dump_json(row) + b"\n" for row in rows)
+
+
+def export_response(query, params, format: str, filename: str):
+    """Stream a report query as CSV or NDJSON from a server-side cursor."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    encode = stream_csv if format == "csv" else stream_ndjson
+    batches = db.stream_query(query, params, label=f"export_{filename}", describe=format == "csv")
+    return StreamingResponse(
+        encode(batches),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+
+# Password hashing on a dedicated, bounded thread pool
+class PasswordHasher:
+    """Runs bcrypt off the event loop and off Starlette's shared threadpool.
+
+    bcrypt releases the GIL, so `workers` threads verify passwords in
+    parallel. At most `max_pending` jobs may be queued or running; past that
+    callers get a 503 right away instead of queueing behind a login burst.
+    The worker threads are started with the app and stopped on shutdown;
+    a hasher used outside the lifespan starts them on first use.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
 
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+        return hashed.decode("utf-8")
 
-db = Database()
+    def needs_rehash(self, hashed: str) -> bool:
+        # Modular crypt format: $2b$<cost>$<salt+hash>
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def start(self):
+        with self._lock:
+            self._ensure_executor()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_executor(self):
+        # Caller holds self._lock
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent logins, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            future = self._ensure_executor().submit(fn, *args)
+            self._pending += 1
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("BCRYPT_MAX_PENDING", "32")),
+    rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
+
+
+async def rehash_password(email: str, password: str, old_hash: str):
+    """Upgrade a stored hash to the configured bcrypt cost after a successful login."""
+    try:
+        new_hash = await password_hasher.hash(password)
+    except HTTPException:
+        return  # hasher saturated; try again on the next login
+    # Only replace the hash we verified, in case the password changed meanwhile
+    await db.execute_query(
+        "UPDATE library.library_user SET hashed_password = %s WHERE email = %s AND hashed_password = %s",
+        (new_hash, email, old_hash),
+        label="password_rehash",
+    )
+    logger.info(f"Rehashed password for {email} with cost {password_hasher.rounds}")
 
 
 # Dependencies for auth
-def require_login(request: Request):
+async def require_login(request: Request):
     if "user_email" not in request.session:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
     return {
@@ -106,7 +1390,7 @@ def require_login(request: Request):
     }
 
 
-def require_admin(user=Depends(require_login)):
+async def require_admin(user=Depends(require_login)):
     if user.get("role") != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return user
@@ -123,6 +1407,15 @@ class BorrowRequest(BaseModel):
     lab_id: int
 
 
+class BorrowBatchRequest(BaseModel):
+    items: list[BorrowRequest]
+    email: Optional[str] = None
+
+
+class ReturnBatchRequest(BaseModel):
+    borrowing_ids: list[int]
+
+
 class CanBorrowRequest(BaseModel):
     publication_id: int
     email: Optional[str] = None
@@ -150,14 +1443,15 @@ class ProposalUpdate(BaseModel):
 
 
 @app.post("/api/auth/login")
-def login(payload: LoginRequest, request: Request):
+async def login(payload: LoginRequest, request: Request, background_tasks: BackgroundTasks):
     email = payload.email
     password = payload.password
 
-    user = db.execute_query(
+    user = await db.execute_query(
         "SELECT * FROM library.library_user WHERE email = %s AND active = true",
         (email,),
         fetch_one=True,
+        label="login_user",
     )
 
     if not user:
@@ -165,13 +1459,15 @@ def login(payload: LoginRequest, request: Request):
 
     # Verify password
     if "hashed_password" in user and user["hashed_password"]:
-        password_bytes = password.encode('utf-8')
-        hashed_bytes = user["hashed_password"].encode('utf-8')
-        if not bcrypt.checkpw(password_bytes, hashed_bytes):
+        if not await password_hasher.verify(password, user["hashed_password"]):
             raise HTTPException(status_code=401, detail="Invalid credentials")
     else:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # Transparently move the stored hash to the configured cost, after the response
+    if password_hasher.needs_rehash(user["hashed_password"]):
+        background_tasks.add_task(rehash_password, user["email"], password, user["hashed_password"])
+
     # Set session
     request.session["user_email"] = user["email"]
     request.session["user_name"] = user["name"]
@@ -190,7 +1486,7 @@ def login(payload: LoginRequest, request: Request):
 
 
 @app.post("/api/auth/logout")
-def logout(request: Request, user=Depends(require_login)):
+async def logout(request: Request, user=Depends(require_login)):
     email = request.session.get("user_email")
     request.session.clear()
     logger.info(f"User {email} logged out")
@@ -198,15 +1494,16 @@ def logout(request: Request, user=Depends(require_login)):
 
 
 @app.get("/api/auth/me")
-def get_current_user(request: Request, user=Depends(require_login)):
+async def get_current_user(request: Request, user=Depends(require_login)):
     email = request.session.get("user_email")
-    user_row = db.execute_query(
+    user_row = await db.execute_query(
         "SELECT * FROM library.library_user WHERE email = %s",
         (email,),
         fetch_one=True,
+        label="current_user",
     )
 
-    labs = db.execute_query(
+    labs = await db.execute_query(
         """
         SELECT l.id_lab, l.name 
         FROM library.lab l
@@ -214,6 +1511,7 @@ def get_current_user(request: Request, user=Depends(require_login)):
         WHERE ua.email = %s
         """,
         (email,),
+        label="user_labs",
     )
 
     return {"user": user_row, "labs": labs, "role": request.session.get("user_role")}
@@ -224,171 +1522,274 @@ def get_current_user(request: Request, user=Depends(require_login)):
 # ============================================================================
 
 
+def _looks_like_identifier(search: str) -> bool:
+    # ISBNs and report numbers: a single token containing digits
+    return bool(search) and not any(c.isspace() for c in search) and any(c.isdigit() for c in search)
+
+
+async def _match_identifier(search):
+    """Exact ISBN / identification number lookup, or None when nothing matches."""
+    if not _looks_like_identifier(search):
+        return None
+    rows = await db.execute_query(
+        """
+        SELECT id_publication FROM library.regular_book
+        WHERE REGEXP_REPLACE(isbn, '[^0-9Xx]', '', 'g') = %s
+        UNION
+        SELECT id_publication FROM library.internal_report
+        WHERE identification_number = %s
+        """,
+        (re.sub(r"[^0-9Xx]", "", search), search),
+        label="identifier_lookup",
+    )
+    return [row["id_publication"] for row in rows] or None
+
+
+def _publication_filters(search, type, lab_id, available, identifier_ids=None):
+    """WHERE clauses and parameters shared by the publication list queries."""
+    clauses = []
+    params = []
+
+    if identifier_ids:
+        clauses.append("p.id_publication = ANY(%s)")
+        params.append(identifier_ids)
+    elif search:
+        # Full-text match on title/authors/keywords/publisher, substring and
+        # typo-tolerant trigram match on the title; all three are indexed
+        clauses.append(
+            "(p.search_vector @@ WEBSEARCH_TO_TSQUERY('english', %s)"
+            " OR p.title ILIKE %s OR %s <%% p.title)"
+        )
+        params.extend([search, f"%{search}%", search])
+
+    if type:
+        clauses.append("p.publication_type = %s")
+        params.append(type)
+
+    # Copy filters go through EXISTS so each publication appears only once
+    if lab_id is not None or available:
+        copy_clauses = ["pc.id_publication = p.id_publication"]
+        if lab_id is not None:
+            copy_clauses.append("pc.id_lab = %s")
+            params.append(lab_id)
+        if available:
+            copy_clauses.append("pc.status = 'on_rack'")
+        clauses.append(
+            f"EXISTS (SELECT 1 FROM library.publication_copy pc WHERE {' AND '.join(copy_clauses)})"
+        )
+
+    return clauses, params
+
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    """Decode a cursor made by encode_cursor, holding one value of each of `types`."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # bool is an int subclass, but never a valid keyset value
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or any(isinstance(v, bool) or not isinstance(v, t) for v, t in zip(values, types))
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
 @app.get("/api/publications")
-def get_publications(
-    page: int = 1,
-    per_page: int = 20,
+@conditional("catalog", "copies")
+async def get_publications(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1),
     search: Optional[str] = "",
     type: Optional[str] = "",
     lab_id: Optional[int] = None,
     available: bool = False,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
     per_page = min(per_page, int(os.getenv("MAX_PAGE_SIZE", "100")))
-    offset = (page - 1) * per_page
+    identifier_ids = await _match_identifier(search)
+    clauses, params = _publication_filters(search, type, lab_id, available, identifier_ids)
+    where = "".join(f" AND {clause}" for clause in clauses)
+
+    # Text searches are ranked by relevance, everything else is in title order.
+    # Keyset pagination follows the same order: the cursor holds the sort key
+    # of the last row of the previous page, so deep pages cost the same as the
+    # first and every page continues exactly where the previous one stopped.
+    ranked = bool(search) and not identifier_ids
+    rank_join = ""
+    rank_params = []
+    if ranked:
+        rank_join = (
+            # float8 end to end, so the cursor's rank compares equal to the row's
+            " CROSS JOIN LATERAL (SELECT (TS_RANK(p.search_vector, WEBSEARCH_TO_TSQUERY('english', %s))"
+            " + WORD_SIMILARITY(%s, p.title))::FLOAT8 AS rank) r"
+        )
+        rank_params = [search, search]
+        order_by = "r.rank DESC, p.id_publication"
+    else:
+        order_by = "p.title, p.id_publication"
+
+    page_clause = ""
+    page_params = []
+    if cursor:
+        if ranked:
+            last = decode_cursor(cursor, (int, float), int)
+            page_clause = " AND (r.rank < %s::FLOAT8 OR (r.rank = %s::FLOAT8 AND p.id_publication > %s))"
+            page_params = [last[0], last[0], last[1]]
+        else:
+            page_clause = " AND (p.title, p.id_publication) > (%s, %s)"
+            page_params = decode_cursor(cursor, str, int)
+        page = None
+        offset = 0
+    else:
+        offset = (page - 1) * per_page
 
-    query = """
-        SELECT DISTINCT
+    query = f"""
+        SELECT
             p.id_publication,
             p.title,
             p.year_publication,
             p.publication_type,
             p.edition,
             pub.name as publisher_name,
-            STRING_AGG(DISTINCT a.name, ', ') as authors
+            (
+                SELECT STRING_AGG(DISTINCT a.name, ', ')
+                FROM library.publication_author pa
+                JOIN library.author a ON pa.id_author = a.id_author
+                WHERE pa.id_publication = p.id_publication
+            ) as authors{", r.rank" if ranked else ""}
         FROM library.publication p
-        LEFT JOIN library.publisher pub ON p.id_publisher = pub.id_publisher
-        LEFT JOIN library.publication_author pa ON p.id_publication = pa.id_publication
-        LEFT JOIN library.author a ON pa.id_author = a.id_author
-        LEFT JOIN library.publication_copy pc ON p.id_publication = pc.id_publication
-        WHERE 1=1
-    """
-
-    params = []
-
-    if search:
-        query += " AND LOWER(p.title) LIKE LOWER(%s)"
-        params.append(f"%{search}%")
-
-    if type:
-        query += " AND p.publication_type = %s"
-        params.append(type)
-
-    if lab_id is not None:
-        query += " AND pc.id_lab = %s"
-        params.append(lab_id)
-
-    if available:
-        query += " AND pc.status = 'on_rack'"
-
-    query += """
-        GROUP BY p.id_publication, p.title, p.year_publication, 
-                 p.publication_type, p.edition, pub.name
-        ORDER BY p.title
+        LEFT JOIN library.publisher pub ON p.id_publisher = pub.id_publisher{rank_join}
+        WHERE 1=1{where}{page_clause}
+        ORDER BY {order_by}
         LIMIT %s OFFSET %s
     """
-    params.extend([per_page, offset])
-
-    publications = db.execute_query(query, params)
-
-    count_query = "SELECT COUNT(DISTINCT p.id_publication) FROM library.publication p"
-    if search or type or lab_id is not None or available:
-        count_query += " LEFT JOIN library.publication_copy pc ON p.id_publication = pc.id_publication WHERE 1=1"
-        count_params = []
-        if search:
-            count_query += " AND LOWER(p.title) LIKE LOWER(%s)"
-            count_params.append(f"%{search}%")
-        if type:
-            count_query += " AND p.publication_type = %s"
-            count_params.append(type)
-        if lab_id is not None:
-            count_query += " AND pc.id_lab = %s"
-            count_params.append(lab_id)
-        if available:
-            count_query += " AND pc.status = 'on_rack'"
-        total = db.execute_query(count_query, count_params, fetch_one=True)["count"]
-    else:
-        total = db.execute_query(count_query, fetch_one=True)["count"]
 
-    return {
+    # One extra row tells us whether there is a next page
+    rows = await db.execute_query(
+        query, rank_params + params + page_params + [per_page + 1, offset], label="publications_page"
+    )
+    publications = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last_row = publications[-1]
+        if ranked:
+            next_cursor = encode_cursor(last_row["rank"], last_row["id_publication"])
+        else:
+            next_cursor = encode_cursor(last_row["title"], last_row["id_publication"])
+    if ranked:
+        for row in publications:
+            del row["rank"]
+
+    total = None
+    pages = None
+    if include_total:
+        count_query = f"SELECT COUNT(*) FROM library.publication p WHERE 1=1{where}"
+        total = (await db.execute_query(count_query, params, fetch_one=True, label="publications_count"))["count"]
+        pages = (total + per_page - 1) // per_page
+
+    return FastJSONResponse({
         "publications": publications,
         "pagination": {
             "page": page,
             "per_page": per_page,
             "total": total,
-            "pages": (total + per_page - 1) // per_page,
+            "pages": pages,
+            "next_cursor": next_cursor,
         },
-    }
+    })
 
 
-@app.get("/api/publications/{id}")
-def get_publication(id: int):
-    publication = db.execute_query(
-        """
-        SELECT 
-            p.*,
-            pub.name as publisher_name,
-            rb.isbn,
-            per.volume_number,
-            ir.identification_number,
-            ir.report_type
-        FROM library.publication p
-        LEFT JOIN library.publisher pub ON p.id_publisher = pub.id_publisher
-        LEFT JOIN library.regular_book rb ON p.id_publication = rb.id_publication
-        LEFT JOIN library.periodic per ON p.id_publication = per.id_publication
-        LEFT JOIN library.internal_report ir ON p.id_publication = ir.id_publication
-        WHERE p.id_publication = %s
+@app.get("/api/publications/facets")
+@conditional("catalog", "copies")
+async def get_publication_facets(
+    request: Request,
+    search: Optional[str] = "",
+    type: Optional[str] = "",
+    lab_id: Optional[int] = None,
+    available: bool = False,
+):
+    identifier_ids = await _match_identifier(search)
+    clauses, params = _publication_filters(search, type, lab_id, available, identifier_ids)
+    where = "".join(f" AND {clause}" for clause in clauses)
+
+    # Every facet of the current filter in one scan, one grouping set per facet
+    rows = await db.execute_query(
+        f"""
+        WITH filtered AS (
+            SELECT
+                p.id_publication,
+                p.publication_type,
+                EXISTS (
+                    SELECT 1 FROM library.publication_copy pc
+                    WHERE pc.id_publication = p.id_publication AND pc.status = 'on_rack'
+                ) as is_available
+            FROM library.publication p
+            WHERE 1=1{where}
+        )
+        SELECT
+            CASE
+                WHEN GROUPING(f.publication_type) = 0 THEN 'type'
+                WHEN GROUPING(pc.id_lab) = 0 THEN 'lab'
+                WHEN GROUPING(f.is_available) = 0 THEN 'availability'
+                ELSE 'total'
+            END as facet,
+            f.publication_type,
+            pc.id_lab,
+            l.name as lab_name,
+            f.is_available,
+            COUNT(DISTINCT f.id_publication) as count
+        FROM filtered f
+        LEFT JOIN library.publication_copy pc ON f.id_publication = pc.id_publication
+        LEFT JOIN library.lab l ON pc.id_lab = l.id_lab
+        GROUP BY GROUPING SETS ((f.publication_type), (pc.id_lab, l.name), (f.is_available), ())
         """,
-        (id,),
-        fetch_one=True,
+        params,
+        label="publication_facets",
     )
 
-    if not publication:
-        raise HTTPException(status_code=404, detail="Publication not found")
-
-    authors = db.execute_query(
-        """
-        SELECT a.name, a.email
-        FROM library.author a
-        JOIN library.publication_author pa ON a.id_author = pa.id_author
-        WHERE pa.id_publication = %s
-        ORDER BY pa.author_order
-        """,
-        (id,),
-    )
+    facets = {"total": 0, "types": {}, "labs": [], "availability": {"available": 0, "unavailable": 0}}
+    for row in rows:
+        if row["facet"] == "total":
+            facets["total"] = row["count"]
+        elif row["facet"] == "type":
+            facets["types"][row["publication_type"]] = row["count"]
+        elif row["facet"] == "lab" and row["id_lab"] is not None:
+            facets["labs"].append({"id_lab": row["id_lab"], "name": row["lab_name"], "count": row["count"]})
+        elif row["facet"] == "availability":
+            facets["availability"]["available" if row["is_available"] else "unavailable"] = row["count"]
+    facets["labs"].sort(key=lambda lab: lab["name"])
 
-    categories = db.execute_query(
-        """
-        SELECT c.name
-        FROM library.category c
-        JOIN library.book_category bc ON c.id_category = bc.id_category
-        WHERE bc.id_publication = %s
-        """,
-        (id,),
-    )
+    return facets
 
-    keywords = db.execute_query(
-        """
-        SELECT k.word
-        FROM library.keyword k
-        JOIN library.publication_keyword pk ON k.id_keyword = pk.id_keyword
-        WHERE pk.id_publication = %s
-        """,
-        (id,),
-    )
 
-    copies = db.execute_query(
-        """
-        SELECT 
-            pc.id_copy,
-            l.name as lab_name,
-            pc.status,
-            pc.purchase_price,
-            pc.currency,
-            b.name as bookshop_name
-        FROM library.publication_copy pc
-        JOIN library.lab l ON pc.id_lab = l.id_lab
-        LEFT JOIN library.bookshop b ON pc.id_bookshop = b.id_bookshop
-        WHERE pc.id_publication = %s
-        """,
+@app.get("/api/publications/{id}")
+@conditional("catalog", "copies")
+@cached(
+    ttl=float(os.getenv("CACHE_TTL_PUBLICATION", "60")),
+    tags=lambda kwargs: ("publications", f"publication:{kwargs['id']}"),
+)
+async def get_publication(id: int, request: Request):
+    # Publication, authors, categories, keywords and copies in one round trip
+    row = await db.execute_query(
+        "SELECT library.get_publication_details(%s) AS publication",
         (id,),
+        fetch_one=True,
+        label="publication_details",
     )
 
-    publication["authors"] = authors
-    publication["categories"] = [c["name"] for c in categories]
-    publication["keywords"] = [k["word"] for k in keywords]
-    publication["copies"] = copies
+    if not row or row["publication"] is None:
+        raise HTTPException(status_code=404, detail="Publication not found")
 
-    return publication
+    return row["publication"]
 
 
 # ============================================================================
@@ -397,14 +1798,25 @@ def get_publication(id: int):
 
 
 @app.get("/api/borrowings")
-def get_borrowings(request: Request, user=Depends(require_login)):
+async def get_borrowings(
+    request: Request,
+    page: Optional[int] = Query(None, ge=1),
+    per_page: int = Query(50, ge=1),
+    cursor: Optional[str] = None,
+    active: bool = False,
+    overdue: bool = False,
+    lab_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    stream: bool = False,
+    columnar: bool = False,
+    user=Depends(require_login),
+):
     email = request.session.get("user_email")
     role = request.session.get("user_role")
 
     if role == "admin":
-        borrowings = db.execute_query(
-            """
-            SELECT 
+        columns = """
                 b.id_borrowing,
                 b.borrow_date,
                 b.due_date,
@@ -413,93 +1825,141 @@ def get_borrowings(request: Request, user=Depends(require_login)):
                 lu.name as user_name,
                 p.title,
                 l.name as lab_name
-            FROM library.borrowing b
-            JOIN library.publication_copy pc ON b.id_copy = pc.id_copy
-            JOIN library.publication p ON pc.id_publication = p.id_publication
-            JOIN library.lab l ON pc.id_lab = l.id_lab
-            JOIN library.library_user lu ON b.email = lu.email
-            ORDER BY b.borrow_date DESC
-            """
-        )
+        """
+        joins = "JOIN library.library_user lu ON b.email = lu.email"
+        clauses, params = [], []
     else:
-        borrowings = db.execute_query(
-            """
-            SELECT 
+        columns = """
                 b.id_borrowing,
                 b.borrow_date,
                 b.due_date,
                 b.return_date,
                 p.title,
                 l.name as lab_name
+        """
+        joins = ""
+        clauses, params = ["b.email = %s"], [email]
+
+    if active or overdue:
+        clauses.append("b.return_date IS NULL")
+    if overdue:
+        clauses.append("b.due_date < CURRENT_DATE")
+    if lab_id is not None:
+        clauses.append("pc.id_lab = %s")
+        params.append(lab_id)
+    if date_from is not None:
+        clauses.append("b.borrow_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        clauses.append("b.borrow_date <= %s")
+        params.append(date_to)
+
+    # Keyset pagination on (borrow_date, id_borrowing), newest first
+    paginated = page is not None or cursor is not None
+    if cursor:
+        last = decode_cursor(cursor, str, int)
+        try:
+            last[0] = date.fromisoformat(last[0])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        clauses.append("(b.borrow_date, b.id_borrowing) < (%s, %s)")
+        params.extend(last)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"""
+            SELECT {columns}
             FROM library.borrowing b
             JOIN library.publication_copy pc ON b.id_copy = pc.id_copy
             JOIN library.publication p ON pc.id_publication = p.id_publication
             JOIN library.lab l ON pc.id_lab = l.id_lab
-            WHERE b.email = %s
-            ORDER BY b.borrow_date DESC
-            """,
-            (email,),
+            {joins}
+            {where}
+            ORDER BY b.borrow_date DESC, b.id_borrowing DESC
+    """
+
+    # Stream the whole (filtered) history through a server-side cursor
+    if stream:
+        if columnar:
+            raise HTTPException(status_code=400, detail="columnar is not supported with stream")
+        return StreamingResponse(
+            stream_json_array(db.stream_query(query, params, label="borrowings_stream")),
+            media_type="application/json",
         )
 
-    return borrowings
+    if not paginated:
+        return FastJSONResponse(await db.execute_query(query, params, label="borrowings_list", columnar=columnar))
+
+    per_page = min(per_page, int(os.getenv("MAX_PAGE_SIZE", "100")))
+    offset = 0 if cursor else (page - 1) * per_page
+    result = await db.execute_query(
+        query + " LIMIT %s OFFSET %s", params + [per_page + 1, offset], label="borrowings_page", columnar=columnar
+    )
+    rows = result["rows"] if columnar else result
+    borrowings = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last_row = borrowings[-1]
+        if columnar:
+            columns = result["columns"]
+            last_row = {"borrow_date": last_row[columns.index("borrow_date")],
+                        "id_borrowing": last_row[columns.index("id_borrowing")]}
+        next_cursor = encode_cursor(last_row["borrow_date"].isoformat(), last_row["id_borrowing"])
+
+    pagination = {
+        "page": None if cursor else page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+    }
+    # Columnar pages keep the columnar shape, with the pagination alongside
+    if columnar:
+        return FastJSONResponse({"columns": result["columns"], "rows": borrowings, "pagination": pagination})
+    return FastJSONResponse({"borrowings": borrowings, "pagination": pagination})
 
 
 @app.post("/api/borrowings", status_code=201)
-def create_borrowing(payload: BorrowRequest, request: Request, user=Depends(require_login)):
+async def create_borrowing(payload: BorrowRequest, request: Request, user=Depends(require_login)):
     email = request.session.get("user_email")
     publication_id = payload.publication_id
     lab_id = payload.lab_id
 
-    can_borrow = db.execute_function("can_user_borrow_publication", (email, publication_id))
-
-    if not can_borrow or not can_borrow[0]["can_borrow"]:
-        reason = can_borrow[0]["reason"] if can_borrow else "Cannot borrow this publication"
-        raise HTTPException(status_code=403, detail=reason)
-
-    copy = db.execute_query(
-        """
-        SELECT id_copy 
-        FROM library.publication_copy 
-        WHERE id_publication = %s 
-        AND id_lab = %s 
-        AND status = 'on_rack'
-        LIMIT 1
-        """,
-        (publication_id, lab_id),
+    # Access check, copy lock and insert run as one transaction on the server
+    result = await db.execute_query(
+        "SELECT * FROM library.borrow_publication(%s, %s, %s)",
+        (email, publication_id, lab_id),
         fetch_one=True,
+        label="borrow",
     )
 
-    if not copy:
-        raise HTTPException(status_code=404, detail="No available copy in this lab")
-
-    due_date = datetime.now().date() + timedelta(days=14)
-    result = db.execute_query(
-        """
-        INSERT INTO library.borrowing (id_copy, email, borrow_date, due_date)
-        VALUES (%s, %s, CURRENT_DATE, %s)
-        RETURNING id_borrowing
-        """,
-        (copy["id_copy"], email, due_date),
-        fetch_one=True,
-    )
+    if result["outcome"] == "forbidden":
+        raise HTTPException(status_code=403, detail=result["reason"])
+    if result["outcome"] == "unavailable":
+        raise HTTPException(status_code=404, detail=result["reason"])
 
+    cache.invalidate("stats", "labs", f"publication:{publication_id}")
     logger.info(f"User {email} borrowed publication {publication_id} from lab {lab_id}")
 
-    return {"message": "Book borrowed successfully", "borrowing_id": result["id_borrowing"], "due_date": due_date.isoformat()}
+    return {
+        "message": result["reason"],
+        "borrowing_id": result["id_borrowing"],
+        "due_date": result["due_date"].isoformat(),
+    }
 
 
 @app.put("/api/borrowings/{id}/return")
-def return_book(id: int, request: Request, user=Depends(require_login)):
+async def return_book(id: int, request: Request, user=Depends(require_login)):
     email = request.session.get("user_email")
     role = request.session.get("user_role")
 
-    borrowing = db.execute_query(
+    borrowing = await db.execute_query(
         """
-        SELECT * FROM library.borrowing 
-        WHERE id_borrowing = %s AND return_date IS NULL
+        SELECT b.*, pc.id_publication
+        FROM library.borrowing b
+        JOIN library.publication_copy pc ON b.id_copy = pc.id_copy
+        WHERE b.id_borrowing = %s AND b.return_date IS NULL
         """,
         (id,),
         fetch_one=True,
+        label="return_lookup",
     )
 
     if not borrowing:
@@ -508,63 +1968,145 @@ def return_book(id: int, request: Request, user=Depends(require_login)):
     if role != "admin" and borrowing["email"] != email:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
-    db.execute_query(
+    await db.execute_query(
         """
         UPDATE library.borrowing 
         SET return_date = CURRENT_DATE 
         WHERE id_borrowing = %s
         """,
         (id,),
+        label="return",
     )
 
+    cache.invalidate("stats", "labs", f"publication:{borrowing['id_publication']}")
     logger.info(f"Borrowing {id} returned by {email}")
 
     return {"message": "Book returned successfully"}
 
 
+def check_batch_size(items):
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > max_items:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {max_items} items")
+
+
+def batch_summary(results, success):
+    succeeded = sum(1 for r in results if r["outcome"] == success)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+@app.post("/api/borrowings/batch")
+async def create_borrowings(payload: BorrowBatchRequest, request: Request, user=Depends(require_login)):
+    email = payload.email or request.session.get("user_email")
+    if email != request.session.get("user_email") and request.session.get("user_role") != "admin":
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    check_batch_size(payload.items)
+
+    results = await db.execute_query(
+        "SELECT * FROM library.borrow_publications(%s, %s, %s)",
+        (email, [item.publication_id for item in payload.items], [item.lab_id for item in payload.items]),
+        label="borrow_batch",
+    )
+
+    borrowed = {r["publication_id"] for r in results if r["outcome"] == "borrowed"}
+    if borrowed:
+        cache.invalidate("stats", "labs", *(f"publication:{id}" for id in borrowed))
+    logger.info(f"User {email} borrowed {len(borrowed)} of {len(results)} publications in a batch")
+
+    return batch_summary(results, "borrowed")
+
+
+@app.put("/api/borrowings/returns")
+async def return_books(payload: ReturnBatchRequest, request: Request, user=Depends(require_login)):
+    email = request.session.get("user_email")
+    check_batch_size(payload.borrowing_ids)
+
+    results = await db.execute_query(
+        "SELECT * FROM library.return_borrowings(%s, %s, %s)",
+        (email, request.session.get("user_role") == "admin", payload.borrowing_ids),
+        label="return_batch",
+    )
+
+    returned = [r for r in results if r["outcome"] == "returned"]
+    if returned:
+        cache.invalidate("stats", "labs", *(f"publication:{r['id_publication']}" for r in returned))
+    logger.info(f"{len(returned)} of {len(results)} borrowings returned by {email} in a batch")
+
+    return batch_summary(results, "returned")
+
+
 # ============================================================================
 # REPORTS ENDPOINTS
 # ============================================================================
 
 
 @app.get("/api/reports/all-publications")
-def report_all_publications():
-    publications = db.execute_query("SELECT * FROM library.all_unique_publications")
+@cached(ttl=float(os.getenv("CACHE_TTL_REPORTS", "300")), tags=("catalog",))
+async def report_all_publications(format: Optional[str] = None, columnar: bool = False):
+    if format:
+        return export_response("SELECT * FROM library.all_unique_publications", None, format, "publications")
+
+    publications = await db.execute_query(
+        "SELECT * FROM library.all_unique_publications", label="all_publications", columnar=columnar
+    )
     return publications
 
 
 @app.get("/api/reports/user-borrowings/{email}")
-def report_user_borrowings(email: str, request: Request, user=Depends(require_login)):
+async def report_user_borrowings(
+    email: str,
+    request: Request,
+    format: Optional[str] = None,
+    columnar: bool = False,
+    user=Depends(require_login),
+):
     if request.session.get("user_role") != "admin" and request.session.get("user_email") != email:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
     lab_id = request.query_params.get("lab_id")
-    borrowings = db.execute_function(
+    lab_id = int(lab_id) if lab_id else None
+    if format:
+        return export_response(
+            "SELECT * FROM library.get_user_borrowed_publications(%s, %s)",
+            (email, lab_id),
+            format,
+            "user-borrowings",
+        )
+
+    borrowings = await db.execute_function(
         "get_user_borrowed_publications",
         (email, lab_id) if lab_id else (email,),
+        columnar=columnar,
     )
-    return borrowings
+    return FastJSONResponse(borrowings)
 
 
 @app.get("/api/reports/lab-value/{lab_id}")
-def report_lab_value(lab_id: int, user=Depends(require_admin)):
-    value = db.execute_function("get_lab_total_value_in_euro", (lab_id,))
+async def report_lab_value(lab_id: int, user=Depends(require_admin)):
+    value = await db.execute_function("get_lab_total_value_in_euro", (lab_id,))
     return value[0] if value else {}
 
 
 @app.post("/api/reports/can-borrow")
-def report_can_borrow(payload: CanBorrowRequest, request: Request, user=Depends(require_login)):
+async def report_can_borrow(payload: CanBorrowRequest, request: Request, user=Depends(require_login)):
     email = payload.email or request.session.get("user_email")
     publication_id = payload.publication_id
 
-    result = db.execute_function("can_user_borrow_publication", (email, publication_id))
+    result = await db.execute_function("can_user_borrow_publication", (email, publication_id))
     return result[0] if result else {}
 
 
 @app.get("/api/reports/lost-books")
-def report_lost_books(user=Depends(require_admin)):
-    lost_books = db.execute_query("SELECT * FROM library.lost_books_report")
-    return lost_books
+async def report_lost_books(format: Optional[str] = None, columnar: bool = False, user=Depends(require_admin)):
+    if format:
+        return export_response("SELECT * FROM library.lost_books_report", None, format, "lost-books")
+
+    lost_books = await db.execute_query(
+        "SELECT * FROM library.lost_books_report", label="lost_books", columnar=columnar
+    )
+    return FastJSONResponse(lost_books)
 
 
 # ============================================================================
@@ -573,8 +2115,10 @@ def report_lost_books(user=Depends(require_admin)):
 
 
 @app.get("/api/labs")
-def get_labs():
-    labs = db.execute_query(
+@conditional("copies")
+@cached(ttl=float(os.getenv("CACHE_TTL_LABS", "60")), tags=("labs",))
+async def get_labs(request: Request):
+    labs = await db.execute_query(
         """
         SELECT 
             l.*,
@@ -584,7 +2128,8 @@ def get_labs():
         LEFT JOIN library.publication_copy pc ON l.id_lab = pc.id_lab
         GROUP BY l.id_lab
         ORDER BY l.name
-        """
+        """,
+        label="labs"
     )
     return labs
 
@@ -595,8 +2140,8 @@ def get_labs():
 
 
 @app.get("/api/users")
-def get_users(user=Depends(require_admin)):
-    users = db.execute_query(
+async def get_users(columnar: bool = False, user=Depends(require_admin)):
+    users = await db.execute_query(
         """
         SELECT 
             lu.*,
@@ -607,9 +2152,11 @@ def get_users(user=Depends(require_admin)):
         LEFT JOIN library.borrowing b ON lu.email = b.email
         GROUP BY lu.email
         ORDER BY lu.name
-        """
+        """,
+        label="users",
+        columnar=columnar,
     )
-    return users
+    return FastJSONResponse(users)
 
 
 # ============================================================================
@@ -618,25 +2165,49 @@ def get_users(user=Depends(require_admin)):
 
 
 @app.get("/api/stats")
-def get_statistics():
-    stats = db.execute_query("SELECT * FROM library.library_statistics", fetch_one=True)
+@conditional("stats")
+@cached(ttl=float(os.getenv("CACHE_TTL_STATS", "10")), tags=("stats",))
+async def get_statistics(request: Request):
+    stats = await db.execute_query("SELECT * FROM library.library_statistics", fetch_one=True, label="statistics")
     return stats
 
 
+@app.get("/api/stats/pool")
+async def get_pool_statistics(user=Depends(require_admin)):
+    return db.pool_stats()
+
+
+@app.get("/api/stats/cache")
+async def get_cache_statistics(user=Depends(require_admin)):
+    return cache.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request, query and pool latencies plus pool and cache gauges, for Prometheus to scrape."""
+    lines = []
+    for metric in (request_duration, query_duration, pool_wait, query_errors, app_errors):
+        lines += metric.render()
+    lines += _render_gauges("library_db_pool_", db.pool_stats(), "/api/stats/pool")
+    lines += _render_gauges("library_cache_", cache.stats(), "/api/stats/cache")
+    lines += _render_gauges("library_log_", {"dropped_records": log_handler.dropped}, "the log queue")
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ============================================================================
 # PROPOSALS ENDPOINTS
 # ============================================================================
 
 
 @app.get("/api/proposals")
-def get_proposals(user=Depends(require_login)):
+async def get_proposals(user=Depends(require_login)):
     """Get all proposals. Admin sees all, regular users see only their own."""
     email = user["email"]
     role = user["role"]
 
     if role == "admin":
         # Admin sees all proposals
-        proposals = db.execute_query(
+        proposals = await db.execute_query(
             """
             SELECT
                 pp.*,
@@ -644,11 +2215,12 @@ def get_proposals(user=Depends(require_login)):
             FROM library.proposed_publication pp
             LEFT JOIN library.library_user lu ON pp.email = lu.email
             ORDER BY pp.date_proposal DESC
-            """
+            """,
+            label="proposals_all"
         )
     else:
         # Regular users see only their proposals
-        proposals = db.execute_query(
+        proposals = await db.execute_query(
             """
             SELECT
                 pp.*,
@@ -658,14 +2230,15 @@ def get_proposals(user=Depends(require_login)):
             WHERE pp.email = %s
             ORDER BY pp.date_proposal DESC
             """,
-            (email,)
+            (email,),
+            label="proposals_user"
         )
 
-    return proposals
+    return FastJSONResponse(proposals)
 
 
 @app.post("/api/proposals")
-def create_proposal(proposal: ProposalCreate, user=Depends(require_login)):
+async def create_proposal(proposal: ProposalCreate, user=Depends(require_login)):
     """Create a new publication proposal."""
     email = user["email"]
 
@@ -679,16 +2252,19 @@ def create_proposal(proposal: ProposalCreate, user=Depends(require_login)):
         "justification": proposal.justification
     }
 
-    result = db.execute_query(
+    result = await db.execute_query(
         """
         INSERT INTO library.proposed_publication
         (email, title, publication_type, details, status)
-        VALUES (%s, %s, %s, %s, 'pending')
+        VALUES (%s, %s, %s, %s::jsonb, 'pending')
         RETURNING id_proposal, date_proposal
         """,
-        (email, proposal.title, proposal.publication_type, psycopg2.extras.Json(details))
+        (email, proposal.title, proposal.publication_type, json.dumps(details)),
+        label="proposal_create"
     )
 
+    cache.invalidate("stats")
+
     return {
         "message": "Proposal created successfully",
         "id_proposal": result[0]["id_proposal"] if result else None,
@@ -697,11 +2273,11 @@ def create_proposal(proposal: ProposalCreate, user=Depends(require_login)):
 
 
 @app.put("/api/proposals/{proposal_id}")
-def update_proposal(proposal_id: int, update: ProposalUpdate, user=Depends(require_admin)):
+async def update_proposal(proposal_id: int, update: ProposalUpdate, user=Depends(require_admin)):
     """Update proposal status (admin only)."""
     email = user["email"]
 
-    db.execute_query(
+    await db.execute_query(
         """
         UPDATE library.proposed_publication
         SET status = %s,
@@ -709,9 +2285,12 @@ def update_proposal(proposal_id: int, update: ProposalUpdate, user=Depends(requi
             reviewed_at = CURRENT_TIMESTAMP
         WHERE id_proposal = %s
         """,
-        (update.status, email, proposal_id)
+        (update.status, email, proposal_id),
+        label="proposal_update"
     )
 
+    cache.invalidate("stats")
+
     return {"message": "Proposal updated successfully"}
 
 
@@ -724,12 +2303,24 @@ def update_proposal(proposal_id: int, update: ProposalUpdate, user=Depends(requi
 def http_exception_handler(request: Request, exc: StarletteHTTPException):
     if exc.status_code == 404:
         return JSONResponse(status_code=404, content={"error": "Endpoint not found"})
-    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": exc.detail},
+        headers=getattr(exc, "headers", None),
+    )
+
+
+@app.exception_handler(PoolError)
+def pool_error_handler(request: Request, exc: PoolError):
+    logger.warning(f"Database pool unavailable: {exc}")
+    app_errors.inc("pool_unavailable")
+    return JSONResponse(status_code=503, content={"error": "Service temporarily unavailable"})
 
 
 @app.exception_handler(Exception)
 def unhandled_exception_handler(request: Request, exc: Exception):
     logger.error(f"Internal server error: {exc}")
+    app_errors.inc(type(exc).__name__)
     return JSONResponse(status_code=500, content={"error": "Internal server error"})
 
 
@@ -745,7 +2336,7 @@ if __name__ == "__main__":
 
     # Test database connection
     try:
-        test_conn = db.get_connection()
+        test_conn = Database().get_connection()
         test_conn.close()
         print("✓ Database connection successful")
     except Exception as e:
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+API Benchmark Script
+Drives the API with scripted scenarios and reports latency percentiles per route
+
+Runs in-process through ASGI by default, or against a running server with --url.
+Results are saved as JSON so runs can be compared between commits:
+
+    python backend/benchmark.py run --duration 30 --output before.json
+    python backend/benchmark.py run --duration 30 --output after.json
+    python backend/benchmark.py compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+# Accounts used by the virtual users (email:password), cycled when there are more users than accounts
+DEFAULT_ACCOUNTS = ["admin@ec-lyon.fr:admin123", "manager@ec-lyon.fr:manager123", "user@ec-lyon.fr:user123"]
+
+SEARCH_TERMS = ["database", "systems", "networks", "learning", "analysis", "distributed", "theory", "design"]
+
+
+class Recorder:
+    """Collects latencies and status codes per route"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    async def request(self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "error"
+        if self.recording:
+            self.latencies[f"{method} {route}"].append((time.perf_counter() - started) * 1000)
+            self.statuses[f"{method} {route}"][status] += 1
+        return response
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, math.ceil(p * len(values) / 100) - 1))
+    return values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float):
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        statuses = recorder.statuses[route]
+        errors = sum(n for status, n in statuses.items() if status == "error" or status >= 500)
+        routes[route] = {
+            "requests": len(latencies),
+            "throughput": round(len(latencies) / elapsed, 2),
+            "errors": errors,
+            "statuses": {str(status): n for status, n in sorted(statuses.items(), key=str)},
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+
+    everything = sorted(latency for latencies in recorder.latencies.values() for latency in latencies)
+    total = {
+        "requests": len(everything),
+        "throughput": round(len(everything) / elapsed, 2),
+        "errors": sum(route["errors"] for route in routes.values()),
+        "p50_ms": round(percentile(everything, 50), 2) if everything else None,
+        "p95_ms": round(percentile(everything, 95), 2) if everything else None,
+        "p99_ms": round(percentile(everything, 99), 2) if everything else None,
+    }
+    return routes, total
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+
+class VirtualUser:
+    """One logged-in client looping over the selected scenarios"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.publication_ids = []
+        self.borrowable = []
+
+    async def setup(self, email: str, password: str):
+        response = await self.client.post("/api/auth/login", json={"email": email, "password": password})
+        if response.status_code != 200:
+            raise RuntimeError(f"Login failed for {email}: {response.status_code} {response.text}")
+
+        catalog = await self.client.get("/api/publications", params={"per_page": 100})
+        self.publication_ids = [p["id_publication"] for p in catalog.json()["publications"]]
+
+        # Publications currently on the rack in the labs this user can borrow from
+        me = (await self.client.get("/api/auth/me")).json()
+        for lab in me["labs"]:
+            available = await self.client.get(
+                "/api/publications", params={"lab_id": lab["id_lab"], "available": "true", "per_page": 50}
+            )
+            self.borrowable += [(p["id_publication"], lab["id_lab"]) for p in available.json()["publications"]]
+
+    async def catalog(self):
+        params = {"page": self.rng.randint(1, 5), "per_page": 20}
+        if self.rng.random() < 0.5:
+            params["search"] = self.rng.choice(SEARCH_TERMS)
+        if self.rng.random() < 0.2:
+            params["type"] = self.rng.choice(["book", "periodic", "thesis", "scientific_report"])
+        await self.recorder.request(self.client, "GET", "/api/publications", "/api/publications", params=params)
+        if self.rng.random() < 0.3:
+            await self.recorder.request(
+                self.client, "GET", "/api/publications/facets", "/api/publications/facets",
+                params={"search": params.get("search")} if "search" in params else None,
+            )
+
+    async def detail(self):
+        if self.publication_ids:
+            id = self.rng.choice(self.publication_ids)
+            await self.recorder.request(self.client, "GET", "/api/publications/{id}", f"/api/publications/{id}")
+
+    async def borrow(self):
+        if not self.borrowable:
+            return
+        publication_id, lab_id = self.rng.choice(self.borrowable)
+        response = await self.recorder.request(
+            self.client, "POST", "/api/borrowings", "/api/borrowings",
+            json={"publication_id": publication_id, "lab_id": lab_id},
+        )
+        if response is not None and response.status_code == 201:
+            id = response.json()["borrowing_id"]
+            await self.recorder.request(
+                self.client, "PUT", "/api/borrowings/{id}/return", f"/api/borrowings/{id}/return"
+            )
+
+    async def dashboard(self):
+        await self.recorder.request(self.client, "GET", "/api/stats", "/api/stats")
+        await self.recorder.request(self.client, "GET", "/api/labs", "/api/labs")
+        await self.recorder.request(
+            self.client, "GET", "/api/borrowings", "/api/borrowings", params={"page": 1, "per_page": 20}
+        )
+
+
+SCENARIOS = {
+    "catalog": VirtualUser.catalog,
+    "detail": VirtualUser.detail,
+    "borrow": VirtualUser.borrow,
+    "dashboard": VirtualUser.dashboard,
+}
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+
+def make_client(args):
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+
+    from app import app
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout)
+
+
+async def drive(args, recorder: Recorder):
+    accounts = args.account or DEFAULT_ACCOUNTS
+    scenarios = [SCENARIOS[name] for name in args.scenarios.split(",")]
+    users = []
+    for i in range(args.concurrency):
+        email, password = accounts[i % len(accounts)].split(":", 1)
+        user = VirtualUser(make_client(args), recorder, random.Random(args.seed + i))
+        await user.setup(email, password)
+        users.append(user)
+
+    async def loop(user: VirtualUser, deadline: float):
+        while time.perf_counter() < deadline:
+            await user.rng.choice(scenarios)(user)
+
+    try:
+        if args.warmup:
+            print(f"Warming up for {args.warmup}s...")
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(loop(user, deadline) for user in users))
+
+        print(f"Running {args.scenarios} with {args.concurrency} users for {args.duration}s...")
+        recorder.recording = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(loop(user, deadline) for user in users))
+        return time.perf_counter() - started
+    finally:
+        for user in users:
+            await user.client.aclose()
+
+
+async def run_benchmark(args):
+    recorder = Recorder()
+    if args.url:
+        elapsed = await drive(args, recorder)
+    else:
+        # ASGITransport does not send lifespan events; open the pools ourselves
+        from app import app
+
+        async with app.router.lifespan_context(app):
+            elapsed = await drive(args, recorder)
+    return recorder, elapsed
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(routes, total):
+    print("\n" + "=" * 96)
+    print(f"{'Route':<40} {'Reqs':>7} {'Req/s':>8} {'Err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    print("-" * 96)
+    for route, r in routes.items():
+        print(f"{route:<40} {r['requests']:>7} {r['throughput']:>8.1f} {r['errors']:>5} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+    print("-" * 96)
+    if total["requests"]:
+        print(f"{'TOTAL':<40} {total['requests']:>7} {total['throughput']:>8.1f} {total['errors']:>5} "
+              f"{total['p50_ms']:>8.1f} {total['p95_ms']:>8.1f} {total['p99_ms']:>8.1f}")
+    print("=" * 96 + "\n")
+
+
+def run(args):
+    recorder, elapsed = asyncio.run(run_benchmark(args))
+    routes, total = summarize(recorder, elapsed)
+    print_results(routes, total)
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "target": args.url or "in-process",
+            "db_backend": os.getenv("DB_BACKEND", "sync"),
+            "scenarios": args.scenarios,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+        },
+        "total": total,
+        "routes": routes,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results saved to {args.output}")
+    return 1 if total["errors"] else 0
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    def change(old, new):
+        return (new - old) / old * 100 if old else 0.0
+
+    print(f"\nBaseline: {baseline['meta'].get('commit')} ({baseline['meta']['timestamp']})")
+    print(f"Current:  {current['meta'].get('commit')} ({current['meta']['timestamp']})")
+    print("=" * 96)
+    print(f"{'Route':<40} {'Req/s':>14} {'p50 ms':>20} {'p95 ms':>20}")
+    print("-" * 96)
+
+    regressions = []
+    for route in sorted(set(baseline["routes"]) | set(current["routes"])):
+        old, new = baseline["routes"].get(route), current["routes"].get(route)
+        if not old or not new:
+            print(f"{route:<40} {'only in ' + ('current' if new else 'baseline'):>14}")
+            continue
+        p95_change = change(old["p95_ms"], new["p95_ms"])
+        print(f"{route:<40} {change(old['throughput'], new['throughput']):>+13.1f}% "
+              f"{old['p50_ms']:>8.1f} -> {new['p50_ms']:<8.1f} {old['p95_ms']:>8.1f} -> {new['p95_ms']:<8.1f}"
+              f"{' !' if p95_change > args.threshold else ''}")
+        if p95_change > args.threshold:
+            regressions.append(route)
+    print("=" * 96)
+
+    if regressions:
+        print(f"p95 regressed by more than {args.threshold}% on: {', '.join(regressions)}")
+        return 1
+    print(f"No p95 regression above {args.threshold}%")
+    return 0
+
+
+def main():
+    """Main function to handle command line arguments"""
+    parser = argparse.ArgumentParser(description="Library API Benchmark")
+    subparsers = parser.add_subparsers(dest="command", help="Commands")
+
+    run_parser = subparsers.add_parser("run", help="Run a benchmark")
+    run_parser.add_argument("--url", help="Benchmark a running server (default: in-process ASGI)")
+    run_parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                            help=f"Comma-separated scenarios ({', '.join(SCENARIOS)})")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    run_parser.add_argument("--duration", type=float, default=20, help="Measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=3, help="Unmeasured warm-up seconds")
+    run_parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds")
+    run_parser.add_argument("--account", action="append", help="email:password to log in with (repeatable)")
+    run_parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    run_parser.add_argument("--output", help="Save results as JSON")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline", help="Baseline results JSON")
+    compare_parser.add_argument("current", help="Current results JSON")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="Allowed p95 increase in percent")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        sys.exit(run(args))
+    elif args.command == "compare":
+        sys.exit(compare(args))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,181 @@
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
+from array import array
+from itertools import accumulate
 import os
-from typing import Dict
+import csv
+import io
+import json
+import random
+import time
+from typing import Dict, Iterable, Iterator, List
 import argparse
 import sys
 
+import bcrypt
+
+# Catalog import: columns accepted in each file kind (CSV header or NDJSON keys).
+# Every kind except publications links to a publication through its catalog ref.
+IMPORT_COLUMNS = {
+    'publications': ['ref', 'title', 'publication_type', 'year_publication', 'edition', 'publisher',
+                     'isbn', 'volume_number', 'identification_number', 'report_type'],
+    'authors': ['ref', 'name', 'email', 'author_order'],
+    'keywords': ['ref', 'word'],
+    'copies': ['ref', 'lab', 'status', 'purchase_price', 'currency', 'purchase_date', 'bookshop'],
+}
+
+# Set-based merge of one staging batch into the catalog
+IMPORT_MERGES = {
+    'publications': """
+        -- Keep the first row of a ref repeated within the batch
+        DELETE FROM staging_publications s
+        USING staging_publications d
+        WHERE s.ref = d.ref AND s.ctid > d.ctid;
+
+        -- Reuse publications already imported, or already in the catalog under the same identifier
+        UPDATE staging_publications s SET id_publication = ip.id_publication
+        FROM library.import_publication ip WHERE ip.ref = s.ref;
+        UPDATE staging_publications s SET id_publication = rb.id_publication
+        FROM library.regular_book rb WHERE s.id_publication IS NULL AND rb.isbn = s.isbn;
+        UPDATE staging_publications s SET id_publication = ir.id_publication
+        FROM library.internal_report ir
+        WHERE s.id_publication IS NULL AND ir.identification_number = s.identification_number;
+
+        UPDATE staging_publications
+        SET id_publication = NEXTVAL(PG_GET_SERIAL_SEQUENCE('library.publication', 'id_publication')),
+            is_new = TRUE
+        WHERE id_publication IS NULL;
+
+        INSERT INTO library.publisher (name)
+        SELECT DISTINCT publisher FROM staging_publications WHERE is_new AND publisher IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+
+        INSERT INTO library.publication (id_publication, title, year_publication, publication_type, id_publisher, edition)
+        SELECT s.id_publication, s.title, s.year_publication::INTEGER,
+               s.publication_type::library.publication_type, pub.id_publisher, s.edition
+        FROM staging_publications s
+        LEFT JOIN library.publisher pub ON pub.name = s.publisher
+        WHERE s.is_new;
+
+        INSERT INTO library.regular_book (id_publication, isbn)
+        SELECT id_publication, isbn FROM staging_publications
+        WHERE is_new AND publication_type = 'book';
+        INSERT INTO library.periodic (id_publication, volume_number)
+        SELECT id_publication, volume_number FROM staging_publications
+        WHERE is_new AND publication_type = 'periodic';
+        INSERT INTO library.internal_report (id_publication, identification_number, report_type)
+        SELECT id_publication, identification_number, COALESCE(report_type, publication_type)
+        FROM staging_publications
+        WHERE is_new AND publication_type IN ('thesis', 'scientific_report');
+
+        INSERT INTO library.import_publication (ref, id_publication)
+        SELECT ref, id_publication FROM staging_publications
+        ON CONFLICT (ref) DO NOTHING;
+    """,
+    'authors': """
+        INSERT INTO library.author (name, email)
+        SELECT DISTINCT ON (LOWER(s.name)) s.name, s.email
+        FROM staging_authors s
+        WHERE s.name IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM library.author a WHERE LOWER(a.name) = LOWER(s.name))
+        ORDER BY LOWER(s.name);
+        -- The search vector triggers fired by the links below join author; plan them on real sizes
+        ANALYZE library.author;
+
+        INSERT INTO library.publication_author (id_publication, id_author, author_order)
+        SELECT ip.id_publication, a.id_author, COALESCE(s.author_order::INTEGER, 1)
+        FROM staging_authors s
+        JOIN library.import_publication ip ON ip.ref = s.ref
+        JOIN LATERAL (
+            SELECT id_author FROM library.author
+            WHERE LOWER(name) = LOWER(s.name)
+            ORDER BY id_author LIMIT 1
+        ) a ON TRUE
+        ON CONFLICT DO NOTHING;
+    """,
+    'keywords': """
+        INSERT INTO library.keyword (word)
+        SELECT DISTINCT word FROM staging_keywords WHERE word IS NOT NULL
+        ON CONFLICT (word) DO NOTHING;
+        ANALYZE library.keyword;
+
+        INSERT INTO library.publication_keyword (id_publication, id_keyword)
+        SELECT ip.id_publication, k.id_keyword
+        FROM staging_keywords s
+        JOIN library.import_publication ip ON ip.ref = s.ref
+        JOIN library.keyword k ON k.word = s.word
+        ON CONFLICT DO NOTHING;
+    """,
+    'copies': """
+        INSERT INTO library.publication_copy (id_publication, id_lab, id_bookshop, purchase_price,
+                                              currency, purchase_date, status)
+        SELECT ip.id_publication, l.id_lab, bs.id_bookshop, s.purchase_price::DECIMAL,
+               COALESCE(s.currency, 'EUR')::library.currency_code, s.purchase_date::DATE,
+               COALESCE(s.status, 'on_rack')::library.publication_status
+        FROM staging_copies s
+        JOIN library.import_publication ip ON ip.ref = s.ref
+        JOIN library.lab l ON l.name = s.lab
+        LEFT JOIN LATERAL (
+            SELECT id_bookshop FROM library.bookshop
+            WHERE name = s.bookshop
+            ORDER BY id_bookshop LIMIT 1
+        ) bs ON TRUE
+        ON CONFLICT (id_publication, id_lab) DO NOTHING;
+    """,
+}
+
+# Tables each kind grows, re-analyzed after every batch so later batches plan on real sizes
+IMPORT_TABLES = {
+    'publications': ['publisher', 'publication', 'regular_book', 'periodic', 'internal_report', 'import_publication'],
+    'authors': ['publication_author'],
+    'keywords': ['publication_keyword'],
+    'copies': ['publication_copy'],
+}
+
+# Staging rows that cannot be linked (unknown ref or lab), reported with the progress
+IMPORT_UNMATCHED = {
+    'authors': "SELECT COUNT(*) FROM staging_authors s "
+               "WHERE NOT EXISTS (SELECT 1 FROM library.import_publication ip WHERE ip.ref = s.ref)",
+    'keywords': "SELECT COUNT(*) FROM staging_keywords s "
+                "WHERE NOT EXISTS (SELECT 1 FROM library.import_publication ip WHERE ip.ref = s.ref)",
+    'copies': "SELECT COUNT(*) FROM staging_copies s "
+              "WHERE NOT EXISTS (SELECT 1 FROM library.import_publication ip WHERE ip.ref = s.ref) "
+              "OR NOT EXISTS (SELECT 1 FROM library.lab l WHERE l.name = s.lab)",
+}
+
+# Synthetic dataset vocabulary (titles are built from these so search benchmarks hit real words)
+GENERATE_WORDS = {
+    'adjectives': ['Advanced', 'Applied', 'Modern', 'Practical', 'Distributed', 'Parallel', 'Statistical',
+                   'Quantum', 'Computational', 'Numerical', 'Robust', 'Scalable', 'Efficient', 'Secure',
+                   'Adaptive', 'Probabilistic', 'Embedded', 'Nonlinear', 'Optimal', 'Interactive'],
+    'nouns': ['Methods', 'Systems', 'Foundations', 'Principles', 'Analysis', 'Design', 'Models',
+              'Algorithms', 'Architectures', 'Techniques', 'Theory', 'Networks', 'Structures', 'Control'],
+    'topics': ['Databases', 'Machine Learning', 'Fluid Mechanics', 'Signal Processing', 'Cryptography',
+               'Operating Systems', 'Materials Science', 'Robotics', 'Compilers', 'Optimization',
+               'Computer Vision', 'Thermodynamics', 'Power Electronics', 'Graph Theory', 'Acoustics',
+               'Control Theory', 'Cloud Computing', 'Tribology', 'Image Analysis', 'Data Mining'],
+    'first_names': ['Alice', 'Bernard', 'Camille', 'David', 'Elena', 'Farid', 'Giulia', 'Hugo', 'Ines',
+                    'Julien', 'Karim', 'Laura', 'Mehdi', 'Nina', 'Olivier', 'Paula', 'Quentin', 'Rania',
+                    'Sophie', 'Thomas', 'Ulrich', 'Valentina', 'Wei', 'Yasmine', 'Zoe'],
+    'last_names': ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand',
+                   'Leroy', 'Moreau', 'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'Smith',
+                   'Johnson', 'Chen', 'Muller', 'Rossi', 'Nguyen', 'Kowalski', 'Silva', 'Tanaka'],
+}
+
+# publication_type -> share of generated publications
+GENERATE_TYPES = {'book': 0.70, 'periodic': 0.15, 'thesis': 0.08, 'scientific_report': 0.07}
+GENERATE_CURRENCIES = {'EUR': 0.70, 'USD': 0.20, 'GBP': 0.10}
+
+
+def zipf_cum_weights(n: int, rng: random.Random, s: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights over n items, ranks shuffled so popularity is not tied to ids"""
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1.0 / rank ** s for rank in ranks))
+
+
 class LibraryDatabaseAdmin:
     """Administration tools for the library database"""
     
@@ -189,33 +358,412 @@ class LibraryDatabaseAdmin:
         print(f"Pending Proposals:    {stats['pending_proposals']:>10}")
         print("="*50 + "\n")
     
+    def rebuild_statistics(self):
+        """Recompute the dashboard counters behind library_statistics"""
+        try:
+            self.cursor.execute("SELECT library.refresh_library_statistics()")
+            self.conn.commit()
+            print("Library statistics rebuilt")
+            
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            print(f"Error rebuilding statistics: {e}")
+    
+    def _read_records(self, filename: str) -> Iterator[Dict]:
+        """Yield catalog records from a CSV (with header) or NDJSON file"""
+        with open(filename, 'r', encoding='utf-8', newline='') as f:
+            if filename.endswith(('.ndjson', '.jsonl')):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from csv.DictReader(f)
+    
+    def _create_staging_tables(self):
+        """Create the session staging tables, emptied at every commit"""
+        for kind, columns in IMPORT_COLUMNS.items():
+            extra = ', id_publication INTEGER, is_new BOOLEAN' if kind == 'publications' else ''
+            self.cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS staging_{kind} "
+                f"({', '.join(f'{c} TEXT' for c in columns)}{extra}) ON COMMIT DELETE ROWS"
+            )
+        self.conn.commit()
+    
+    def _import_batch(self, kind: str, rows) -> int:
+        """COPY one batch into staging and merge it; returns the unmatched row count"""
+        columns = IMPORT_COLUMNS[kind]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # Empty and missing values are loaded as NULL
+        writer.writerows([[row.get(c) for c in columns] for row in rows])
+        buffer.seek(0)
+        self.cursor.copy_expert(
+            f"COPY staging_{kind} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        # Temp tables are never auto-analyzed; give the merge planner real row counts
+        self.cursor.execute(f"ANALYZE staging_{kind}")
+        
+        unmatched = 0
+        if kind in IMPORT_UNMATCHED:
+            self.cursor.execute(IMPORT_UNMATCHED[kind])
+            unmatched = self.cursor.fetchone()[0]
+        self.cursor.execute(IMPORT_MERGES[kind])
+        return unmatched
+    
+    def import_catalog(self, files: Dict[str, str], batch_size: int = 10000, restart: bool = False):
+        """Bulk import catalog files through COPY, one committed batch at a time.
+        
+        Committed batches are recorded in library.import_batch, so rerunning the
+        same command after an interruption resumes where it stopped.
+        """
+        self._create_staging_tables()
+        
+        # Publications first: the other kinds link to them by ref
+        for kind in IMPORT_COLUMNS:
+            filename = files.get(kind)
+            if not filename:
+                continue
+            if not os.path.exists(filename):
+                print(f"File {filename} not found")
+                return
+            
+            source = f"{os.path.abspath(filename)}:{os.path.getsize(filename)}"
+            if restart:
+                self.cursor.execute(
+                    "DELETE FROM library.import_batch WHERE source = %s AND kind = %s", (source, kind)
+                )
+                self.conn.commit()
+            
+            self.cursor.execute("""
+                SELECT COALESCE(SUM(row_count), 0), COALESCE(MAX(batch_no), 0)
+                FROM library.import_batch
+                WHERE source = %s AND kind = %s
+            """, (source, kind))
+            done, batch_no = self.cursor.fetchone()
+            if done:
+                print(f"{kind}: resuming after {done} rows already imported")
+            
+            records = self._read_records(filename)
+            for _ in zip(range(done), records):
+                pass
+            
+            imported = 0
+            started = time.monotonic()
+            while True:
+                rows = [row for _, row in zip(range(batch_size), records)]
+                if not rows:
+                    break
+                batch_no += 1
+                try:
+                    unmatched = self._import_batch(kind, rows)
+                    self.cursor.execute("""
+                        INSERT INTO library.import_batch (source, kind, batch_no, first_row, row_count)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (source, kind, batch_no, done + imported + 1, len(rows)))
+                    self.conn.commit()
+                    for table in IMPORT_TABLES[kind]:
+                        self.cursor.execute(f"ANALYZE library.{table}")
+                    self.conn.commit()
+                except psycopg2.Error as e:
+                    self.conn.rollback()
+                    print(f"Error importing {kind} batch {batch_no} "
+                          f"(rows {done + imported + 1}-{done + imported + len(rows)}): {e}")
+                    print("Fix the file and rerun the same command to resume from this batch")
+                    return
+                
+                imported += len(rows)
+                rate = imported / max(time.monotonic() - started, 1e-6)
+                skipped = f", {unmatched} unmatched" if unmatched else ""
+                print(f"{kind}: batch {batch_no} committed - {done + imported} rows ({rate:,.0f} rows/s{skipped})")
+            
+            print(f"{kind}: {imported} rows imported from {filename}")
+        
+        print("Catalog import complete!")
+    
+    def _copy_rows(self, table: str, columns: List[str], rows: Iterable, batch_size: int = 100000) -> int:
+        """Stream tuples into a table with chunked COPY, printing progress"""
+        started = time.monotonic()
+        total = 0
+        chunk = []
+        
+        def flush():
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(chunk)
+            buffer.seek(0)
+            self.cursor.copy_expert(
+                f"COPY library.{table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            rate = total / max(time.monotonic() - started, 1e-6)
+            print(f"{table}: {total:,} rows ({rate:,.0f} rows/s)")
+            chunk.clear()
+        
+        for row in rows:
+            chunk.append(row)
+            total += 1
+            if len(chunk) >= batch_size:
+                flush()
+        if chunk:
+            flush()
+        return total
+    
+    def _next_id(self, table: str, column: str) -> int:
+        self.cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM library.{table}")
+        return self.cursor.fetchone()[0]
+    
+    def generate_dataset(self, publications: int = 100000, labs: int = 50, users: int = 5000,
+                         borrowings: int = 1000000, seed: int = 42, batch_size: int = 100000):
+        """Generate a large synthetic dataset for benchmarking, streamed through COPY.
+        
+        Borrowing popularity, authorship and keywords follow Zipf distributions,
+        so a few titles and authors dominate as in a real catalog. The same seed
+        on the same starting database produces the same data. Rows are appended
+        next to the existing ones, in a single transaction.
+        
+        Triggers are bypassed while loading (session_replication_role = replica,
+        which needs a superuser). The generator writes consistent rows itself,
+        then rebuilds search vectors and the statistics counters.
+        """
+        # Users are spread round-robin over the labs, so this gives every lab a user
+        if labs < 1 or users < labs:
+            print(f"Error generating dataset: need at least one lab and one user per lab "
+                  f"(got {labs} labs, {users} users)")
+            return
+        
+        rng = random.Random(seed)
+        words = GENERATE_WORDS
+        today = date.today()
+        started = time.monotonic()
+        
+        try:
+            self.cursor.execute("SET LOCAL search_path TO library, public")
+            self.cursor.execute("SET LOCAL session_replication_role = replica")
+            
+            first_publication = self._next_id('publication', 'id_publication')
+            first_lab = self._next_id('lab', 'id_lab')
+            first_author = self._next_id('author', 'id_author')
+            first_keyword = self._next_id('keyword', 'id_keyword')
+            first_publisher = self._next_id('publisher', 'id_publisher')
+            first_copy = self._next_id('publication_copy', 'id_copy')
+            first_borrowing = self._next_id('borrowing', 'id_borrowing')
+            self.cursor.execute("SELECT COUNT(*) FROM library.library_user")
+            first_user = self.cursor.fetchone()[0] + 1
+            self.cursor.execute("SELECT id_category FROM library.category ORDER BY id_category")
+            categories = [row[0] for row in self.cursor.fetchall()]
+            self.cursor.execute("SELECT id_bookshop FROM library.bookshop ORDER BY id_bookshop")
+            bookshops = [row[0] for row in self.cursor.fetchall()] or [None]
+            
+            n_publishers = max(publications // 500, 10)
+            n_authors = max(publications // 3, 10)
+            n_keywords = max(publications // 200, len(words['topics']))
+            
+            # Reference data
+            self._copy_rows('lab', ['id_lab', 'name', 'department'], (
+                (first_lab + i, f"Bench Lab {first_lab + i}", rng.choice(words['topics']))
+                for i in range(labs)
+            ), batch_size)
+            self._copy_rows('publisher', ['id_publisher', 'name'], (
+                (first_publisher + i, f"{rng.choice(words['last_names'])} Press {first_publisher + i}")
+                for i in range(n_publishers)
+            ), batch_size)
+            self._copy_rows('author', ['id_author', 'name'], (
+                (first_author + i, f"{rng.choice(words['first_names'])} {rng.choice(words['last_names'])}")
+                for i in range(n_authors)
+            ), batch_size)
+            self._copy_rows('keyword', ['id_keyword', 'word'], (
+                (first_keyword + i, f"{words['topics'][i % len(words['topics'])].lower()} {first_keyword + i}")
+                for i in range(n_keywords)
+            ), batch_size)
+            
+            # Users, each with access to 1-3 labs; every lab gets at least one user
+            password = bcrypt.hashpw(b'user123', bcrypt.gensalt()).decode()
+            lab_users = [[] for _ in range(labs)]
+            access = []
+            for i in range(users):
+                email = f"bench{first_user + i}@ec-lyon.fr"
+                granted = {i % labs} | {rng.randrange(labs) for _ in range(rng.randint(0, 2))}
+                for lab in granted:
+                    lab_users[lab].append(email)
+                    access.append((email, first_lab + lab))
+            self._copy_rows('library_user', ['email', 'name', 'hashed_password', 'registration_date'], (
+                (f"bench{first_user + i}@ec-lyon.fr",
+                 f"{rng.choice(words['first_names'])} {rng.choice(words['last_names'])}",
+                 password, today - timedelta(days=rng.randrange(1500)))
+                for i in range(users)
+            ), batch_size)
+            self._copy_rows('user_access', ['email', 'id_lab'], access, batch_size)
+            del access
+            
+            # Publications and their subtype rows
+            types = rng.choices(list(GENERATE_TYPES), weights=list(GENERATE_TYPES.values()), k=publications)
+            publisher_weights = zipf_cum_weights(n_publishers, rng)
+            self._copy_rows('publication', ['id_publication', 'title', 'year_publication', 'publication_type',
+                                            'id_publisher', 'edition', 'created_at'], (
+                (first_publication + i,
+                 f"{rng.choice(words['adjectives'])} {rng.choice(words['nouns'])} in {rng.choice(words['topics'])}",
+                 rng.randint(1960, today.year),
+                 types[i],
+                 first_publisher + rng.choices(range(n_publishers), cum_weights=publisher_weights)[0],
+                 f"{rng.randint(1, 5)}th" if types[i] == 'book' and rng.random() < 0.3 else None,
+                 today - timedelta(days=rng.randrange(1500)))
+                for i in range(publications)
+            ), batch_size)
+            self._copy_rows('regular_book', ['id_publication', 'isbn'], (
+                (first_publication + i, f"979-9-{first_publication + i:09d}")
+                for i in range(publications) if types[i] == 'book'
+            ), batch_size)
+            self._copy_rows('periodic', ['id_publication', 'volume_number'], (
+                (first_publication + i, f"Vol. {rng.randint(1, 80)}, No. {rng.randint(1, 12)}")
+                for i in range(publications) if types[i] == 'periodic'
+            ), batch_size)
+            self._copy_rows('internal_report', ['id_publication', 'identification_number', 'report_type'], (
+                (first_publication + i, f"GEN-{first_publication + i}", types[i])
+                for i in range(publications) if types[i] in ('thesis', 'scientific_report')
+            ), batch_size)
+            
+            # Author fan-out: theses have one author, others 1-4; prolific authors follow Zipf
+            author_weights = zipf_cum_weights(n_authors, rng)
+            
+            def publication_authors():
+                for i in range(publications):
+                    count = 1 if types[i] == 'thesis' else rng.choices((1, 2, 3, 4), weights=(45, 30, 17, 8))[0]
+                    picked = dict.fromkeys(rng.choices(range(n_authors), cum_weights=author_weights, k=count))
+                    for order, author in enumerate(picked, 1):
+                        yield first_publication + i, first_author + author, order
+            self._copy_rows('publication_author', ['id_publication', 'id_author', 'author_order'],
+                            publication_authors(), batch_size)
+            
+            keyword_weights = zipf_cum_weights(n_keywords, rng)
+            self._copy_rows('publication_keyword', ['id_publication', 'id_keyword'], (
+                (first_publication + i, first_keyword + keyword)
+                for i in range(publications)
+                for keyword in set(rng.choices(range(n_keywords), cum_weights=keyword_weights,
+                                               k=rng.randint(0, 5)))
+            ), batch_size)
+            if categories:
+                self._copy_rows('book_category', ['id_publication', 'id_category'], (
+                    (first_publication + i, category)
+                    for i in range(publications) if types[i] == 'book'
+                    for category in rng.sample(categories, min(rng.randint(1, 3), len(categories)))
+                ), batch_size)
+            
+            # Copy layout: each publication held by 1+ labs, bigger labs hold more
+            lab_weights = zipf_cum_weights(labs, rng, s=0.8)
+            copy_publication = array('i')
+            copy_lab = array('i')
+            for i in range(publications):
+                held = {rng.choices(range(labs), cum_weights=lab_weights)[0]}
+                while len(held) < labs and rng.random() < 0.35:
+                    held.add(rng.choices(range(labs), cum_weights=lab_weights)[0])
+                for lab in held:
+                    copy_publication.append(i)
+                    copy_lab.append(lab)
+            n_copies = len(copy_publication)
+            
+            # Borrowing popularity follows the publication's Zipf rank, split across its copies;
+            # copies in a lab nobody can access are never borrowed
+            popularity = zipf_cum_weights(publications, rng)
+            holders = [0] * publications
+            for i in copy_publication:
+                holders[i] += 1
+            copy_weights = list(accumulate(
+                (popularity[i] - (popularity[i - 1] if i else 0.0)) / holders[i] if lab_users[lab] else 0.0
+                for i, lab in zip(copy_publication, copy_lab)
+            ))
+            del popularity, holders
+            
+            # Borrowings over the last two years; recent ones may still be open (one per copy)
+            open_copies = set()
+            
+            def borrowing_rows():
+                remaining = borrowings
+                next_id = first_borrowing
+                while remaining:
+                    for copy in rng.choices(range(n_copies), cum_weights=copy_weights, k=min(remaining, batch_size)):
+                        borrow_date = today - timedelta(days=rng.randrange(730))
+                        if (today - borrow_date).days < 45 and copy not in open_copies and rng.random() < 0.5:
+                            open_copies.add(copy)
+                            return_date = None
+                        else:
+                            return_date = min(borrow_date + timedelta(days=rng.randint(1, 30)), today)
+                        yield (next_id, first_copy + copy, rng.choice(lab_users[copy_lab[copy]]),
+                               borrow_date, borrow_date + timedelta(days=14), return_date)
+                        next_id += 1
+                    remaining -= min(remaining, batch_size)
+            self._copy_rows('borrowing', ['id_borrowing', 'id_copy', 'email', 'borrow_date', 'due_date', 'return_date'],
+                            borrowing_rows(), batch_size)
+            
+            currencies = rng.choices(list(GENERATE_CURRENCIES), weights=list(GENERATE_CURRENCIES.values()), k=n_copies)
+            self._copy_rows('publication_copy', ['id_copy', 'id_publication', 'id_lab', 'id_bookshop',
+                                                 'purchase_price', 'currency', 'purchase_date', 'status'], (
+                (first_copy + c,
+                 first_publication + copy_publication[c],
+                 first_lab + copy_lab[c],
+                 rng.choice(bookshops),
+                 round(rng.lognormvariate(3.6, 0.5), 2),
+                 currencies[c],
+                 today - timedelta(days=rng.randrange(3650)),
+                 'issued_to' if c in open_copies else ('lost' if rng.random() < 0.005 else 'on_rack'))
+                for c in range(n_copies)
+            ), batch_size)
+            
+            # Keep serial sequences ahead of the explicit ids
+            for table, column in (('publication', 'id_publication'), ('lab', 'id_lab'), ('author', 'id_author'),
+                                  ('keyword', 'id_keyword'), ('publisher', 'id_publisher'),
+                                  ('publication_copy', 'id_copy'), ('borrowing', 'id_borrowing')):
+                self.cursor.execute(
+                    f"SELECT SETVAL(PG_GET_SERIAL_SEQUENCE('library.{table}', '{column}'), "
+                    f"(SELECT MAX({column}) FROM library.{table}))"
+                )
+            
+            print("Building search vectors...")
+            self.cursor.execute("ANALYZE library.publication_author")
+            self.cursor.execute("ANALYZE library.publication_keyword")
+            self.cursor.execute("ANALYZE library.author")
+            self.cursor.execute("ANALYZE library.keyword")
+            self.cursor.execute("""
+                UPDATE library.publication p
+                SET search_vector = library.publication_search_document(p.id_publication, p.title, p.id_publisher)
+                WHERE p.id_publication >= %s
+            """, (first_publication,))
+            
+            self.cursor.execute("SET LOCAL session_replication_role = origin")
+            self.cursor.execute("SELECT library.refresh_library_statistics()")
+            # The version triggers were bypassed too; invalidate every ETag
+            self.cursor.execute("UPDATE library.data_version SET version = version + 1")
+            self.conn.commit()
+            
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            print(f"Error generating dataset: {e}")
+            return
+        
+        # Fresh planner statistics for the benchmarks that follow
+        self.conn.autocommit = True
+        self.cursor.execute("ANALYZE")
+        self.conn.autocommit = False
+        print(f"Dataset generated in {time.monotonic() - started:,.0f}s")
+    
     def add_test_borrowings(self, count: int = 5):
         """Add random test borrowings"""
         try:
-            # Get available copies and users with access
+            # Pick available copies and users with access, inserted in one statement
             self.cursor.execute("""
-                SELECT pc.id_copy, lu.email
-                FROM library.publication_copy pc
-                JOIN library.user_access ua ON pc.id_lab = ua.id_lab
-                JOIN library.library_user lu ON ua.email = lu.email
-                WHERE pc.status = 'on_rack'
+                INSERT INTO library.borrowing (id_copy, email, borrow_date, due_date)
+                SELECT id_copy, email, CURRENT_DATE, CURRENT_DATE + 14
+                FROM (
+                    SELECT DISTINCT ON (pc.id_copy) pc.id_copy, lu.email
+                    FROM library.publication_copy pc
+                    JOIN library.user_access ua ON pc.id_lab = ua.id_lab
+                    JOIN library.library_user lu ON ua.email = lu.email
+                    WHERE pc.status = 'on_rack'
+                    ORDER BY pc.id_copy, RANDOM()
+                ) available
                 ORDER BY RANDOM()
                 LIMIT %s
             """, (count,))
             
-            available = self.cursor.fetchall()
-            
-            for id_copy, email in available:
-                borrow_date = datetime.now().date()
-                due_date = borrow_date + timedelta(days=14)
-                
-                self.cursor.execute("""
-                    INSERT INTO library.borrowing (id_copy, email, borrow_date, due_date)
-                    VALUES (%s, %s, %s, %s)
-                """, (id_copy, email, borrow_date, due_date))
-            
             self.conn.commit()
-            print(f"Added {len(available)} test borrowings")
+            print(f"Added {self.cursor.rowcount} test borrowings")
             
         except psycopg2.Error as e:
             self.conn.rollback()
@@ -288,6 +836,7 @@ def main():
     subparsers.add_parser('init', help='Initialize database with schema and data')
     subparsers.add_parser('stats', help='Show database statistics')
     subparsers.add_parser('overdue', help='List overdue books')
+    subparsers.add_parser('rebuild-stats', help='Rebuild dashboard statistics counters')
     
     backup_parser = subparsers.add_parser('backup', help='Backup the database')
     backup_parser.add_argument('--file', help='Backup file name')
@@ -301,6 +850,20 @@ def main():
     return_parser = subparsers.add_parser('return', help='Return a book')
     return_parser.add_argument('id', type=int, help='Borrowing ID')
     
+    import_parser = subparsers.add_parser('import', help='Bulk import a catalog from CSV/NDJSON files')
+    for kind in IMPORT_COLUMNS:
+        import_parser.add_argument(f'--{kind}', help=f'{kind.capitalize()} file ({", ".join(IMPORT_COLUMNS[kind])})')
+    import_parser.add_argument('--batch-size', type=int, default=10000, help='Rows per committed batch')
+    import_parser.add_argument('--restart', action='store_true', help='Ignore progress of previous runs')
+    
+    generate_parser = subparsers.add_parser('generate', help='Generate a large synthetic dataset (superuser)')
+    generate_parser.add_argument('--publications', type=int, default=100000, help='Number of publications')
+    generate_parser.add_argument('--labs', type=int, default=50, help='Number of labs')
+    generate_parser.add_argument('--users', type=int, default=5000, help='Number of users')
+    generate_parser.add_argument('--borrowings', type=int, default=1000000, help='Number of borrowings')
+    generate_parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    generate_parser.add_argument('--batch-size', type=int, default=100000, help='Rows per COPY chunk')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -336,6 +899,11 @@ def main():
         admin.list_overdue_books()
         admin.disconnect()
     
+    elif args.command == 'rebuild-stats':
+        admin.connect()
+        admin.rebuild_statistics()
+        admin.disconnect()
+    
     elif args.command == 'backup':
         admin.connect()
         admin.backup_database(args.file)
@@ -353,6 +921,28 @@ def main():
         admin.connect()
         admin.return_book(args.id)
         admin.disconnect()
+    
+    elif args.command == 'import':
+        admin.connect()
+        admin.import_catalog(
+            {kind: getattr(args, kind) for kind in IMPORT_COLUMNS},
+            batch_size=args.batch_size,
+            restart=args.restart
+        )
+        admin.disconnect()
+    
+    elif args.command == 'generate':
+        admin.connect()
+        admin.generate_dataset(
+            publications=args.publications,
+            labs=args.labs,
+            users=args.users,
+            borrowings=args.borrowings,
+            seed=args.seed,
+            batch_size=args.batch_size
+        )
+        admin.print_statistics()
+        admin.disconnect()
 
 
 if __name__ == '__main__':
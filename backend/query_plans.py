@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Check
+Runs EXPLAIN (ANALYZE, BUFFERS) on every view and read-only function of
+sql/queries.sql and compares the plans with a stored baseline
+
+Meant to run against a generated dataset (db_tools.py generate), so that
+large tables are actually large:
+
+    python backend/query_plans.py baseline   # record sql/plan_baseline.json
+    python backend/query_plans.py check      # fail on seq scans, buffer growth or plan changes
+
+EXPLAIN shows a function call as a single opaque node, so the statements of
+each function body are read from pg_proc and explained on their own, with the
+call's arguments bound as parameters. A function whose body yields no
+explainable statement fails the check.
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASELINE_FILE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "plan_baseline.json"))
+
+# Deterministic arguments picked from the data being checked
+PARAMETERS = {
+    "user_email": "SELECT email FROM borrowing GROUP BY email ORDER BY COUNT(*) DESC, email LIMIT 1",
+    "lab_id": "SELECT id_lab FROM publication_copy GROUP BY id_lab ORDER BY COUNT(*) DESC, id_lab LIMIT 1",
+    "publication_id": """
+        SELECT pc.id_publication FROM borrowing b JOIN publication_copy pc ON b.id_copy = pc.id_copy
+        GROUP BY pc.id_publication ORDER BY COUNT(*) DESC, pc.id_publication LIMIT 1
+    """,
+    "category": """
+        SELECT c.name FROM book_category bc JOIN category c ON bc.id_category = c.id_category
+        GROUP BY c.name ORDER BY COUNT(*) DESC, c.name LIMIT 1
+    """,
+    "author": """
+        SELECT SPLIT_PART(a.name, ' ', 2) FROM publication_author pa JOIN author a ON pa.id_author = a.id_author
+        GROUP BY a.name ORDER BY COUNT(*) DESC, a.name LIMIT 1
+    """,
+    "publisher": """
+        SELECT pub.name FROM publication p JOIN publisher pub ON p.id_publisher = pub.id_publisher
+        GROUP BY pub.name ORDER BY COUNT(*) DESC, pub.name LIMIT 1
+    """,
+}
+
+# name -> (query, parameter names, tables a sequential scan is expected on; "*" for full reports)
+PLAN_QUERIES = {
+    "all_unique_publications": ("SELECT * FROM all_unique_publications", [], ["*"]),
+    # Unfiltered views of create_database.sql: every copy on the rack, every open loan
+    "available_publications": ("SELECT * FROM available_publications", [], ["*"]),
+    "user_borrowed_books": ("SELECT * FROM user_borrowed_books", [], ["*"]),
+    "get_user_borrowed_publications": (
+        "SELECT * FROM get_user_borrowed_publications(%s)", ["user_email"], []),
+    "get_user_borrowed_publications_lab": (
+        "SELECT * FROM get_user_borrowed_publications(%s, %s)", ["user_email", "lab_id"], []),
+    # The busiest lab holds a large share of all copies; their publications are hash joined
+    "get_lab_total_value_in_euro": ("SELECT * FROM get_lab_total_value_in_euro(%s)", ["lab_id"], ["publication"]),
+    "can_user_borrow_publication": (
+        "SELECT * FROM can_user_borrow_publication(%s, %s)", ["user_email", "publication_id"], []),
+    "find_current_borrowers": (
+        "SELECT * FROM find_current_borrowers(%s, %s)", ["user_email", "publication_id"], []),
+    # The most used category covers about a tenth of the books: a report over that share
+    "get_publications_by_category_and_price": (
+        "SELECT * FROM get_publications_by_category_and_price(%s, 100)", ["category"],
+        ["book_category", "publication", "publication_copy", "regular_book"]),
+    # Substring author and publisher matches cannot use a btree index, and the most
+    # common name or publisher matches thousands of publications, joined by hash
+    "get_publications_by_author_after_year": (
+        "SELECT * FROM get_publications_by_author_after_year(%s, 2015)", ["author"], ["author", "publication_author"]),
+    "get_publisher_books_chronological": (
+        "SELECT * FROM get_publisher_books_chronological(%s)", ["publisher"], ["publisher", "publication"]),
+    "get_publication_details": ("SELECT get_publication_details(%s)", ["publication_id"], []),
+    # Hash joins: the filtered side is small, the big table is read once instead of probed per row
+    "lost_books_report": ("SELECT * FROM lost_books_report", [], ["regular_book"]),
+    "recent_publications": ("SELECT * FROM recent_publications", [], ["publication_copy"]),
+    "overdue_borrowings": ("SELECT * FROM overdue_borrowings", [], ["publication_copy"]),
+    "library_statistics": ("SELECT * FROM library_statistics", [], []),
+}
+
+
+def connect():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", 5432),
+        database=os.getenv("DB_NAME", "library_db"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", ""),
+    )
+
+
+FUNCTION_CALL = re.compile(r"\b(\w+)\s*\(")
+
+
+def split_statements(source):
+    """Top-level statements of a function body; the bodies checked here hold no nested blocks"""
+    return [statement.strip() for statement in source.split(";") if statement.strip()]
+
+
+def body_statements(cursor, function):
+    """Explainable statements of a SQL or PL/pgSQL function, with $n placeholders
+
+    Returns (statements, argument types, variable types, argument defaults).
+    Parameters are the function's input arguments followed by its declared
+    PL/pgSQL variables; the variables have no value outside a call and are
+    bound as NULL, which only matters for expressions in the select list here.
+    """
+    cursor.execute("""
+        SELECT p.prosrc, l.lanname, p.proargnames, p.proargmodes,
+               ARRAY(SELECT FORMAT_TYPE(t, NULL) FROM UNNEST(p.proargtypes) t),
+               PG_GET_EXPR(p.proargdefaults, 0)
+        FROM pg_proc p
+        JOIN pg_language l ON p.prolang = l.oid
+        WHERE p.oid = %s::regproc
+    """, (function,))
+    source, language, names, modes, types, defaults = cursor.fetchone()
+    if language not in ("sql", "plpgsql"):
+        return [], [], [], []
+
+    # Input arguments come first; OUT and TABLE columns must not be substituted
+    names = [name for name, mode in zip(names or [], modes or ["i"] * len(names or [])) if mode in ("i", "b")]
+    defaults_row = []
+    if defaults:
+        cursor.execute(f"SELECT {defaults}")
+        defaults_row = list(cursor.fetchone())
+
+    source = re.sub(r"--[^\n]*", "", source)
+    variables = []
+    if language == "plpgsql":
+        block = re.fullmatch(r"\s*(?:DECLARE(?P<declare>.*?))?\bBEGIN\b(?P<body>.*)\bEND\s*;?\s*",
+                             source, re.DOTALL | re.IGNORECASE)
+        if block is None:
+            return [], [], [], []
+        for declaration in split_statements(block["declare"] or ""):
+            name, type_ = re.match(r"(\w+)\s+(.+?)(?:\s*(?::=|=|\bDEFAULT\b).*)?$", declaration, re.DOTALL).groups()
+            variables.append((name, type_))
+        source = block["body"]
+
+    placeholders = names + [name for name, _ in variables]
+    statements = []
+    for statement in split_statements(source):
+        statement = re.sub(r"^RETURN\s+QUERY\s+", "", statement, flags=re.IGNORECASE)
+        if not re.match(r"(SELECT|WITH)\b", statement, re.IGNORECASE):
+            continue
+        if variables:
+            # SELECT ... INTO v_x only assigns the result; drop the target
+            targets = "|".join(re.escape(name) for name, _ in variables)
+            statement = re.sub(rf"\bINTO\s+(?:STRICT\s+)?(?:{targets})(?:\s*,\s*(?:{targets}))*\b", "",
+                               statement, flags=re.IGNORECASE)
+        for position, name in enumerate(placeholders, 1):
+            if name:
+                statement = re.sub(rf"\b{re.escape(name)}\b", f"${position}", statement, flags=re.IGNORECASE)
+        statements.append(statement)
+    return statements, list(types), [type_ for _, type_ in variables], defaults_row
+
+
+def call_arguments(cursor, query, params, start):
+    """Values of the arguments of the call whose parenthesis opens at `start`"""
+    depth = 0
+    for end in range(start, len(query)):
+        depth += {"(": 1, ")": -1}.get(query[end], 0)
+        if depth == 0:
+            break
+    arguments = query[start + 1:end].strip()
+    if not arguments:
+        return []
+    cursor.execute(f"SELECT {arguments}", params)
+    return list(cursor.fetchone())
+
+
+def explain_statement(cursor, query, params=None):
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", params)
+    return cursor.fetchone()[0][0]
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def shape(plans):
+    """Plan tree as indented lines of node type and the relation or index it touches"""
+    lines = []
+
+    def visit(node, depth):
+        target = node.get("Index Name") or node.get("Relation Name") or ""
+        lines.append(f"{'  ' * depth}{node['Node Type']}{f' on {target}' if target else ''}")
+        for child in node.get("Plans", []):
+            visit(child, depth + 1)
+
+    for plan in plans:
+        visit(plan, 0)
+    return lines
+
+
+def explain(cursor, name, query, params):
+    cursor.execute("SAVEPOINT plan_check")
+    try:
+        top = explain_statement(cursor, query, params)
+        body_plans = []
+        function = FUNCTION_CALL.search(query)
+        if function:
+            statements, arguments, variables, defaults = body_statements(cursor, function.group(1))
+            values = call_arguments(cursor, query, params, function.end() - 1)
+            # Arguments left out of the call take their defaults; variables are unset
+            missing = len(arguments) - len(values)
+            values += (defaults[len(defaults) - missing:] if missing else []) + [None] * len(variables)
+            types = arguments + variables
+            for number, statement in enumerate(statements):
+                # Prepared like PL/pgSQL does, so the planner sees the same parameters.
+                # Prepared statements outlive a rolled back savepoint, hence a name per statement.
+                prepared = f"plan_{name}_{number}"
+                cursor.execute(f"PREPARE {prepared} ({', '.join(types)}) AS {statement}" if types
+                               else f"PREPARE {prepared} AS {statement}")
+                execute = f"EXECUTE {prepared} ({', '.join(['%s'] * len(values))})" if types else f"EXECUTE {prepared}"
+                body_plans.append(explain_statement(cursor, execute, values)["Plan"])
+                cursor.execute(f"DEALLOCATE {prepared}")
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT plan_check")
+        return {"error": str(e).strip()}
+    cursor.execute("RELEASE SAVEPOINT plan_check")
+
+    plans = [top["Plan"]] + body_plans
+    return {
+        "time_ms": round(top["Execution Time"], 2),
+        # A call's buffers already include its body's, so count the body statements only once
+        "buffers": sum(plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+                       for plan in (body_plans or plans)),
+        "seq_scans": sorted({
+            node["Relation Name"] for plan in plans for node in walk(plan) if node["Node Type"] == "Seq Scan"
+        }),
+        "shape": shape(plans),
+        # EXPLAIN alone cannot see into a function call
+        "opaque": bool(function) and not body_plans,
+    }
+
+
+def collect():
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SET LOCAL search_path TO library, public")
+
+    cursor.execute("""
+        SELECT relname FROM pg_class
+        WHERE relnamespace = 'library'::regnamespace AND relkind = 'r' AND reltuples >= %s
+    """, (int(os.getenv("PLAN_LARGE_TABLE_ROWS", "10000")),))
+    large_tables = {row[0] for row in cursor.fetchall()}
+
+    values = {}
+    for key, query in PARAMETERS.items():
+        cursor.execute(query)
+        row = cursor.fetchone()
+        values[key] = row[0] if row else None
+
+    results = {}
+    for name, (query, keys, _) in PLAN_QUERIES.items():
+        results[name] = explain(cursor, name, query, [values[key] for key in keys])
+
+    # EXPLAIN ANALYZE runs the statements; never keep anything they did
+    conn.rollback()
+    cursor.execute("SELECT COUNT(*) FROM library.publication")
+    publications = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM library.borrowing")
+    borrowings = cursor.fetchone()[0]
+    cursor.execute("SHOW server_version")
+    version = cursor.fetchone()[0]
+    conn.close()
+
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "server_version": version,
+        "publications": publications,
+        "borrowings": borrowings,
+        "parameters": {key: str(value) for key, value in values.items()},
+    }
+    return meta, results, large_tables
+
+
+def baseline(args):
+    meta, results, _ = collect()
+    errors = {name: r["error"] for name, r in results.items() if "error" in r}
+    errors.update({name: "function body could not be explained" for name, r in results.items() if r.get("opaque")})
+    if errors:
+        for name, error in errors.items():
+            print(f"{name}: {error}")
+        print("Not recording a baseline with failing queries")
+        return 1
+
+    with open(args.file, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "queries": results}, f, indent=2)
+        f.write("\n")
+    print(f"Recorded {len(results)} plans in {args.file} "
+          f"({meta['publications']} publications, {meta['borrowings']} borrowings)")
+    return 0
+
+
+def check(args):
+    meta, results, large_tables = collect()
+    stored = {}
+    if os.path.exists(args.file):
+        with open(args.file, encoding="utf-8") as f:
+            stored = json.load(f)["queries"]
+    else:
+        print(f"No baseline at {args.file}: only checking scans")
+
+    failures = 0
+    print("\n" + "=" * 80)
+    print(f"{'Query':<42} {'ms':>9} {'buffers':>9}  Result")
+    print("-" * 80)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<42} {'':>9} {'':>9}  ERROR {result['error'].splitlines()[0]}")
+            failures += 1
+            continue
+
+        problems = []
+        if result["opaque"]:
+            problems.append("opaque function: body not explained")
+        allowed = PLAN_QUERIES[name][2]
+        if "*" not in allowed:
+            unexpected = [t for t in result["seq_scans"] if t in large_tables and t not in allowed]
+            if unexpected:
+                problems.append(f"seq scan on {', '.join(unexpected)}")
+
+        old = stored.get(name)
+        if old:
+            limit = old["buffers"] * (1 + args.buffer_tolerance / 100) + 100
+            if result["buffers"] > limit:
+                problems.append(f"buffers {old['buffers']} -> {result['buffers']}")
+            if result["shape"] != old["shape"]:
+                problems.append("plan changed")
+
+        print(f"{name:<42} {result['time_ms']:>9.1f} {result['buffers']:>9}  {'; '.join(problems) or 'ok'}")
+        if old and result["shape"] != old["shape"]:
+            for line in difflib.unified_diff(old["shape"], result["shape"], "baseline", "current", lineterm=""):
+                print(f"    {line}")
+        failures += bool(problems)
+    print("=" * 80)
+
+    if failures:
+        print(f"{failures} queries failed the plan check")
+        return 1
+    print("All query plans OK")
+    return 0
+
+
+def main():
+    """Main function to handle command line arguments"""
+    parser = argparse.ArgumentParser(description="Query Plan Regression Check")
+    parser.add_argument("--file", default=BASELINE_FILE, help="Baseline file")
+    subparsers = parser.add_subparsers(dest="command", help="Commands")
+
+    check_parser = subparsers.add_parser("check", help="Check plans against the baseline")
+    check_parser.add_argument("--buffer-tolerance", type=float, default=100,
+                              help="Allowed buffer growth in percent over the baseline")
+    subparsers.add_parser("baseline", help="Record the current plans as the baseline")
+
+    args = parser.parse_args()
+
+    if args.command == "check":
+        sys.exit(check(args))
+    elif args.command == "baseline":
+        sys.exit(baseline(args))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 -- Drop existing schema if exists
 DROP SCHEMA IF EXISTS library CASCADE;
 CREATE SCHEMA library;
-SET search_path TO library;
+SET search_path TO library, public;
+
+-- Trigram matching for fuzzy catalog search (kept in public so it survives schema resets)
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
 
 -- Create ENUM types
 CREATE TYPE publication_status AS ENUM ('on_rack', 'issued_to', 'lost', 'to_be_bought');
@@ -78,7 +81,8 @@ CREATE TABLE publication (
     publication_type publication_type NOT NULL,
     id_publisher INTEGER REFERENCES publisher(id_publisher),
     edition VARCHAR(50),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector TSVECTOR -- Maintained by triggers: title, authors, keywords, publisher
 );
 
 -- Table: Regular Book (inherits from Publication)
@@ -172,17 +176,54 @@ CREATE TABLE proposed_publication (
     status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'approved', 'rejected', 'ordered'))
 );
 
+-- Table: Library Statistics Counters (maintained by triggers, read by library_statistics)
+CREATE TABLE library_counter (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+
+-- Table: Data versions (bumped by triggers on every write, used by the API for ETags)
+CREATE TABLE data_version (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+-- Table: Catalog import references (external catalog key -> publication, used by db_tools.py import)
+CREATE TABLE import_publication (
+    ref VARCHAR(255) PRIMARY KEY,
+    id_publication INTEGER NOT NULL REFERENCES publication(id_publication) ON DELETE CASCADE
+);
+
+-- Table: Catalog import progress (committed batches per source file, so imports can resume)
+CREATE TABLE import_batch (
+    source VARCHAR(1000),
+    kind VARCHAR(20),
+    batch_no INTEGER,
+    first_row INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, kind, batch_no)
+);
+
 -- Indexes for performance
 CREATE INDEX idx_publication_year ON publication(year_publication);
 CREATE INDEX idx_publication_type ON publication(publication_type);
 CREATE INDEX idx_publication_title ON publication(LOWER(title));
+CREATE INDEX idx_publication_title_id ON publication(title, id_publication);
+CREATE INDEX idx_publication_created ON publication(created_at);
 CREATE INDEX idx_copy_status ON publication_copy(status);
 CREATE INDEX idx_copy_lab ON publication_copy(id_lab);
 CREATE INDEX idx_borrowing_email ON borrowing(email);
 CREATE INDEX idx_borrowing_copy ON borrowing(id_copy);
 CREATE INDEX idx_borrowing_return ON borrowing(return_date);
+CREATE INDEX idx_borrowing_date ON borrowing(borrow_date, id_borrowing);
 CREATE INDEX idx_author_name ON author(LOWER(name));
 CREATE INDEX idx_book_isbn ON regular_book(isbn);
+CREATE INDEX idx_book_isbn_digits ON regular_book(REGEXP_REPLACE(isbn, '[^0-9Xx]', '', 'g'));
+
+-- Indexes for catalog search
+CREATE INDEX idx_publication_search ON publication USING GIN (search_vector);
+CREATE INDEX idx_publication_title_trgm ON publication USING GIN (title gin_trgm_ops);
 
 -- Views for common queries
 CREATE VIEW available_publications AS
@@ -276,49 +317,408 @@ CREATE TRIGGER check_categories_limit
 BEFORE INSERT ON book_category
 FOR EACH ROW EXECUTE FUNCTION check_max_categories();
 
--- Function to update copy status when borrowed
+-- Function to update copy status when borrowed or returned
+-- Statement-level: one UPDATE per statement however many borrowings it touches
 CREATE OR REPLACE FUNCTION update_copy_status_on_borrow()
 RETURNS TRIGGER AS $$
 BEGIN
-    IF NEW.return_date IS NULL THEN
-        UPDATE publication_copy 
-        SET status = 'issued_to' 
-        WHERE id_copy = NEW.id_copy;
-    ELSE
-        UPDATE publication_copy 
-        SET status = 'on_rack' 
-        WHERE id_copy = NEW.id_copy;
-    END IF;
-    RETURN NEW;
+    -- A copy with any open borrowing in the statement is issued, otherwise back on rack
+    UPDATE publication_copy pc
+    SET status = c.new_status
+    FROM (
+        SELECT
+            id_copy,
+            CASE WHEN BOOL_OR(return_date IS NULL) THEN 'issued_to' ELSE 'on_rack' END::publication_status AS new_status
+        FROM new_rows
+        GROUP BY id_copy
+    ) c
+    WHERE pc.id_copy = c.id_copy
+    AND pc.status IS DISTINCT FROM c.new_status;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER update_status_on_borrow
-AFTER INSERT OR UPDATE ON borrowing
-FOR EACH ROW EXECUTE FUNCTION update_copy_status_on_borrow();
+CREATE TRIGGER update_status_on_borrow_insert
+AFTER INSERT ON borrowing
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_copy_status_on_borrow();
 
--- Function to check user access rights before borrowing
+CREATE TRIGGER update_status_on_borrow_update
+AFTER UPDATE ON borrowing
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_copy_status_on_borrow();
+
+-- Function to check user access rights on new borrowings
+-- Raising here aborts the whole INSERT, like the former per-row BEFORE check
 CREATE OR REPLACE FUNCTION check_user_access()
 RETURNS TRIGGER AS $$
-DECLARE
-    has_access BOOLEAN;
 BEGIN
-    SELECT EXISTS(
-        SELECT 1 
-        FROM user_access ua
-        JOIN publication_copy pc ON ua.id_lab = pc.id_lab
-        WHERE ua.email = NEW.email 
-        AND pc.id_copy = NEW.id_copy
-    ) INTO has_access;
-    
-    IF NOT has_access THEN
+    IF EXISTS(
+        SELECT 1
+        FROM new_rows n
+        WHERE NOT EXISTS(
+            SELECT 1 
+            FROM user_access ua
+            JOIN publication_copy pc ON ua.id_lab = pc.id_lab
+            WHERE ua.email = n.email 
+            AND pc.id_copy = n.id_copy
+        )
+    ) THEN
         RAISE EXCEPTION 'User does not have access to borrow from this lab';
     END IF;
     
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER check_access_on_borrow
+AFTER INSERT ON borrowing
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION check_user_access();
+
+-- Full-text search document of a publication
+-- Title weighs most, then authors and keywords, then publisher
+CREATE OR REPLACE FUNCTION publication_search_document(
+    p_id_publication INTEGER,
+    p_title TEXT,
+    p_id_publisher INTEGER
+)
+RETURNS TSVECTOR AS $$
+    SELECT
+        SETWEIGHT(TO_TSVECTOR('english', COALESCE(p_title, '')), 'A') ||
+        SETWEIGHT(TO_TSVECTOR('english', COALESCE((
+            SELECT STRING_AGG(a.name, ' ')
+            FROM publication_author pa
+            JOIN author a ON pa.id_author = a.id_author
+            WHERE pa.id_publication = p_id_publication
+        ), '')), 'B') ||
+        SETWEIGHT(TO_TSVECTOR('english', COALESCE((
+            SELECT STRING_AGG(k.word, ' ')
+            FROM publication_keyword pk
+            JOIN keyword k ON pk.id_keyword = k.id_keyword
+            WHERE pk.id_publication = p_id_publication
+        ), '')), 'B') ||
+        SETWEIGHT(TO_TSVECTOR('english', COALESCE((
+            SELECT name FROM publisher WHERE id_publisher = p_id_publisher
+        ), '')), 'C');
+$$ LANGUAGE sql STABLE;
+
+-- Function to compute the search vector when a publication is written
+CREATE OR REPLACE FUNCTION update_publication_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := publication_search_document(NEW.id_publication, NEW.title, NEW.id_publisher);
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER check_access_before_borrow
-BEFORE INSERT ON borrowing
-FOR EACH ROW EXECUTE FUNCTION check_user_access();
\ No newline at end of file
+CREATE TRIGGER publication_search_vector
+BEFORE INSERT OR UPDATE OF title, id_publisher ON publication
+FOR EACH ROW EXECUTE FUNCTION update_publication_search_vector();
+
+-- Function to refresh search vectors when authors, keywords or publishers change
+-- Statement-level: every trigger using it exposes its transition table as changed_rows
+CREATE OR REPLACE FUNCTION refresh_publication_search_vectors()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME IN ('publication_author', 'publication_keyword') THEN
+        UPDATE publication p
+        SET search_vector = publication_search_document(p.id_publication, p.title, p.id_publisher)
+        WHERE p.id_publication IN (SELECT id_publication FROM changed_rows);
+    ELSIF TG_TABLE_NAME = 'author' THEN
+        UPDATE publication p
+        SET search_vector = publication_search_document(p.id_publication, p.title, p.id_publisher)
+        WHERE p.id_publication IN (
+            SELECT pa.id_publication
+            FROM publication_author pa
+            JOIN changed_rows c ON pa.id_author = c.id_author
+        );
+    ELSIF TG_TABLE_NAME = 'keyword' THEN
+        UPDATE publication p
+        SET search_vector = publication_search_document(p.id_publication, p.title, p.id_publisher)
+        WHERE p.id_publication IN (
+            SELECT pk.id_publication
+            FROM publication_keyword pk
+            JOIN changed_rows c ON pk.id_keyword = c.id_keyword
+        );
+    ELSIF TG_TABLE_NAME = 'publisher' THEN
+        UPDATE publication p
+        SET search_vector = publication_search_document(p.id_publication, p.title, p.id_publisher)
+        WHERE p.id_publisher IN (SELECT id_publisher FROM changed_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER search_vector_author_links_insert
+AFTER INSERT ON publication_author
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+CREATE TRIGGER search_vector_author_links_delete
+AFTER DELETE ON publication_author
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+CREATE TRIGGER search_vector_keyword_links_insert
+AFTER INSERT ON publication_keyword
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+CREATE TRIGGER search_vector_keyword_links_delete
+AFTER DELETE ON publication_keyword
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+CREATE TRIGGER search_vector_author_rename
+AFTER UPDATE ON author
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+CREATE TRIGGER search_vector_keyword_rename
+AFTER UPDATE ON keyword
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+CREATE TRIGGER search_vector_publisher_rename
+AFTER UPDATE ON publisher
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_publication_search_vectors();
+
+-- Function to broadcast data changes so every API worker can drop stale cache entries
+-- Statement-level: the payload lists the affected publications once per statement
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ids INTEGER[];
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'borrowing' THEN
+        SELECT ARRAY_AGG(DISTINCT pc.id_publication) INTO v_ids
+        FROM changed_rows c
+        JOIN publication_copy pc ON c.id_copy = pc.id_copy;
+    ELSIF TG_TABLE_NAME IN ('publication', 'publication_copy') THEN
+        SELECT ARRAY_AGG(DISTINCT id_publication) INTO v_ids
+        FROM changed_rows;
+    END IF;
+
+    -- NOTIFY payloads are limited to 8000 bytes: for large statements send no
+    -- ids, which listeners treat as "everything from this table changed"
+    IF ARRAY_LENGTH(v_ids, 1) > 500 THEN
+        v_ids := NULL;
+    END IF;
+
+    PERFORM pg_notify(
+        'library_cache',
+        JSON_BUILD_OBJECT('table', TG_TABLE_NAME, 'ids', v_ids)::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['borrowing', 'publication_copy', 'publication', 'proposed_publication'] LOOP
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation()',
+            v_table || '_notify_insert', v_table
+        );
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation()',
+            v_table || '_notify_update', v_table
+        );
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidation()',
+            v_table || '_notify_delete', v_table
+        );
+    END LOOP;
+END;
+$$;
+
+-- Dashboard counters: one row per statistic, updated by statement-level triggers
+INSERT INTO library_counter (name) VALUES
+('total_publications'),
+('total_copies'),
+('available_copies'),
+('borrowed_copies'),
+('lost_copies'),
+('active_users'),
+('active_borrowings'),
+('pending_proposals');
+
+-- Function to apply the counter deltas of a statement
+-- Rows added count +1 from new_rows, rows removed -1 from old_rows; the two are netted
+-- per counter first, so an UPDATE that moves nothing never writes the hot counter rows
+-- (and so bumps neither the 'stats' data version nor the cache)
+CREATE OR REPLACE FUNCTION update_library_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_counts TEXT;
+    v_deltas TEXT[] := '{}';
+    v_names TEXT[];
+    v_values BIGINT[];
+BEGIN
+    v_counts := CASE TG_TABLE_NAME
+        WHEN 'publication' THEN
+            'SELECT ''total_publications'' AS name, %s * COUNT(*) AS n FROM %I'
+        WHEN 'publication_copy' THEN
+            'SELECT v.name, %s * v.n AS n FROM (
+                SELECT COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE status = ''on_rack'') AS available,
+                       COUNT(*) FILTER (WHERE status = ''issued_to'') AS borrowed,
+                       COUNT(*) FILTER (WHERE status = ''lost'') AS lost
+                FROM %I
+            ) c
+            CROSS JOIN LATERAL (VALUES
+                (''total_copies'', c.total),
+                (''available_copies'', c.available),
+                (''borrowed_copies'', c.borrowed),
+                (''lost_copies'', c.lost)
+            ) v(name, n)'
+        WHEN 'library_user' THEN
+            'SELECT ''active_users'' AS name, %s * COUNT(*) FILTER (WHERE active) AS n FROM %I'
+        WHEN 'borrowing' THEN
+            'SELECT ''active_borrowings'' AS name, %s * COUNT(*) FILTER (WHERE return_date IS NULL) AS n FROM %I'
+        WHEN 'proposed_publication' THEN
+            'SELECT ''pending_proposals'' AS name, %s * COUNT(*) FILTER (WHERE status = ''pending'') AS n FROM %I'
+    END;
+
+    IF TG_OP <> 'DELETE' THEN
+        v_deltas := v_deltas || FORMAT(v_counts, 1, 'new_rows');
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_deltas := v_deltas || FORMAT(v_counts, -1, 'old_rows');
+    END IF;
+
+    EXECUTE FORMAT(
+        'SELECT ARRAY_AGG(name), ARRAY_AGG(n) FROM ('
+        'SELECT d.name, SUM(d.n)::BIGINT AS n FROM (%s) d GROUP BY d.name HAVING SUM(d.n) <> 0'
+        ') net',
+        ARRAY_TO_STRING(v_deltas, ' UNION ALL ')
+    ) INTO v_names, v_values;
+
+    IF v_names IS NOT NULL THEN
+        UPDATE library_counter lc
+        SET value = lc.value + d.n
+        FROM UNNEST(v_names, v_values) d(name, n)
+        WHERE lc.name = d.name;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['publication', 'publication_copy', 'library_user', 'borrowing', 'proposed_publication'] LOOP
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION update_library_counters()',
+            v_table || '_counters_insert', v_table
+        );
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION update_library_counters()',
+            v_table || '_counters_delete', v_table
+        );
+    END LOOP;
+
+    -- Publications are counted without a filter, so updating them never moves a counter.
+    -- (Column lists would narrow these further, but cannot be combined with transition tables.)
+    FOREACH v_table IN ARRAY ARRAY['publication_copy', 'library_user', 'borrowing', 'proposed_publication'] LOOP
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION update_library_counters()',
+            v_table || '_counters_update', v_table
+        );
+    END LOOP;
+END;
+$$;
+
+-- Function to recompute every counter from scratch (after TRUNCATE, bulk loads with
+-- triggers disabled, or to repair drift); blocks writers while it counts
+CREATE OR REPLACE FUNCTION refresh_library_statistics()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE publication, publication_copy, library_user, borrowing, proposed_publication IN SHARE MODE;
+
+    INSERT INTO library_counter (name, value)
+    SELECT name, value
+    FROM (VALUES
+        ('total_publications', (SELECT COUNT(*) FROM publication)),
+        ('total_copies', (SELECT COUNT(*) FROM publication_copy)),
+        ('available_copies', (SELECT COUNT(*) FROM publication_copy WHERE status = 'on_rack')),
+        ('borrowed_copies', (SELECT COUNT(*) FROM publication_copy WHERE status = 'issued_to')),
+        ('lost_copies', (SELECT COUNT(*) FROM publication_copy WHERE status = 'lost')),
+        ('active_users', (SELECT COUNT(*) FROM library_user WHERE active = true)),
+        ('active_borrowings', (SELECT COUNT(*) FROM borrowing WHERE return_date IS NULL)),
+        ('pending_proposals', (SELECT COUNT(*) FROM proposed_publication WHERE status = 'pending'))
+    ) v(name, value)
+    ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Data versions: one row per group of tables, bumped once per writing statement
+-- The API derives ETags from them, so a matching If-None-Match skips the real query.
+-- Bumps are transactional: readers never see a new version before the data it stamps.
+INSERT INTO data_version (name) VALUES
+('catalog'),
+('copies'),
+('stats');
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE name = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    v_group TEXT;
+    v_table TEXT;
+BEGIN
+    -- Borrowings reach 'copies' through the copy status they update
+    FOR v_group, v_table IN VALUES
+        ('catalog', 'publication'), ('catalog', 'regular_book'), ('catalog', 'periodic'),
+        ('catalog', 'internal_report'), ('catalog', 'publication_author'), ('catalog', 'publication_keyword'),
+        ('catalog', 'book_category'), ('catalog', 'author'), ('catalog', 'keyword'),
+        ('catalog', 'publisher'), ('catalog', 'category'),
+        ('copies', 'publication_copy'), ('copies', 'lab'), ('copies', 'bookshop'),
+        ('stats', 'library_counter')
+    LOOP
+        EXECUTE FORMAT(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version(%L)',
+            v_table || '_data_version', v_table, v_group
+        );
+    END LOOP;
+END;
+$$;
+
+-- Every new version is also announced on the cache channel, so API workers can keep
+-- the versions in memory instead of reading this table for each conditional request
+CREATE OR REPLACE FUNCTION notify_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify(
+        'library_cache',
+        JSON_BUILD_OBJECT('data_version', NEW.name, 'version', NEW.version)::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_version_notify AFTER INSERT OR UPDATE ON data_version
+FOR EACH ROW EXECUTE FUNCTION notify_data_version();
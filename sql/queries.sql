@@ -240,8 +240,8 @@ BEGIN
         p.title,
         rb.isbn,
         MIN(pc.purchase_price * c.rate_to_euro) AS min_price_euro,
-        STRING_AGG(DISTINCT pub.name, ', ') AS publishers,
-        STRING_AGG(DISTINCT cat.name, ', ') AS categories
+        STRING_AGG(DISTINCT pub.name, ', ')::VARCHAR AS publishers,
+        STRING_AGG(DISTINCT cat.name, ', ')::VARCHAR AS categories
     FROM publication p
     JOIN regular_book rb ON p.id_publication = rb.id_publication
     JOIN book_category bc ON rb.id_publication = bc.id_publication
@@ -280,7 +280,7 @@ BEGIN
         p.title,
         p.year_publication,
         p.publication_type,
-        STRING_AGG(a.name, ', ' ORDER BY pa.author_order) AS all_authors,
+        STRING_AGG(a.name, ', ' ORDER BY pa.author_order)::VARCHAR AS all_authors,
         pub.name AS publisher
     FROM publication p
     JOIN publication_author pa ON p.id_publication = pa.id_publication
@@ -316,7 +316,7 @@ BEGIN
         p.year_publication AS year,
         p.title,
         rb.isbn,
-        STRING_AGG(a.name, ', ' ORDER BY pa.author_order) AS authors,
+        STRING_AGG(a.name, ', ' ORDER BY pa.author_order)::VARCHAR AS authors,
         p.edition
     FROM publication p
     JOIN publisher pub ON p.id_publisher = pub.id_publisher
@@ -357,6 +357,207 @@ SELECT * FROM lost_books_report;
 
 -- Additional useful queries for the application
 
+-- Full detail document of a publication (authors, categories, keywords, copies)
+-- Built in a single round trip for GET /api/publications/{id}
+CREATE OR REPLACE FUNCTION get_publication_details(p_publication_id INTEGER)
+RETURNS JSON AS $$
+    SELECT JSON_BUILD_OBJECT(
+        'id_publication', p.id_publication,
+        'title', p.title,
+        'year_publication', p.year_publication,
+        'publication_type', p.publication_type,
+        'id_publisher', p.id_publisher,
+        'edition', p.edition,
+        'created_at', p.created_at,
+        'publisher_name', pub.name,
+        'isbn', rb.isbn,
+        'volume_number', per.volume_number,
+        'identification_number', ir.identification_number,
+        'report_type', ir.report_type,
+        'authors', COALESCE((
+            SELECT JSON_AGG(JSON_BUILD_OBJECT('name', a.name, 'email', a.email) ORDER BY pa.author_order)
+            FROM publication_author pa
+            JOIN author a ON pa.id_author = a.id_author
+            WHERE pa.id_publication = p.id_publication
+        ), '[]'::JSON),
+        'categories', COALESCE((
+            SELECT JSON_AGG(c.name)
+            FROM book_category bc
+            JOIN category c ON bc.id_category = c.id_category
+            WHERE bc.id_publication = p.id_publication
+        ), '[]'::JSON),
+        'keywords', COALESCE((
+            SELECT JSON_AGG(k.word)
+            FROM publication_keyword pk
+            JOIN keyword k ON pk.id_keyword = k.id_keyword
+            WHERE pk.id_publication = p.id_publication
+        ), '[]'::JSON),
+        'copies', COALESCE((
+            SELECT JSON_AGG(JSON_BUILD_OBJECT(
+                'id_copy', pc.id_copy,
+                'lab_name', l.name,
+                'status', pc.status,
+                'purchase_price', pc.purchase_price,
+                'currency', pc.currency,
+                'bookshop_name', b.name
+            ))
+            FROM publication_copy pc
+            JOIN lab l ON pc.id_lab = l.id_lab
+            LEFT JOIN bookshop b ON pc.id_bookshop = b.id_bookshop
+            WHERE pc.id_publication = p.id_publication
+        ), '[]'::JSON)
+    )
+    FROM publication p
+    LEFT JOIN publisher pub ON p.id_publisher = pub.id_publisher
+    LEFT JOIN regular_book rb ON p.id_publication = rb.id_publication
+    LEFT JOIN periodic per ON p.id_publication = per.id_publication
+    LEFT JOIN internal_report ir ON p.id_publication = ir.id_publication
+    WHERE p.id_publication = p_publication_id;
+$$ LANGUAGE sql STABLE;
+
+-- Test
+SELECT get_publication_details(1);
+
+-- Borrow a copy of a publication from a lab in one transaction
+-- Locks an on_rack copy so concurrent borrowers never get the same one
+CREATE OR REPLACE FUNCTION borrow_publication(
+    p_user_email VARCHAR(255),
+    p_publication_id INTEGER,
+    p_lab_id INTEGER,
+    p_loan_days INTEGER DEFAULT 14
+)
+RETURNS TABLE (
+    outcome TEXT,
+    reason TEXT,
+    id_borrowing INTEGER,
+    due_date DATE
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_id_copy INTEGER;
+    v_id_borrowing INTEGER;
+    v_due_date DATE;
+BEGIN
+    IF NOT EXISTS(
+        SELECT 1 FROM user_access
+        WHERE email = p_user_email AND id_lab = p_lab_id
+    ) THEN
+        RETURN QUERY SELECT 'forbidden', 'User does not have access to borrow from this lab', NULL::INTEGER, NULL::DATE;
+        RETURN;
+    END IF;
+
+    -- Copies locked by another borrower are skipped rather than waited on
+    SELECT pc.id_copy
+    FROM publication_copy pc
+    WHERE pc.id_publication = p_publication_id
+    AND pc.id_lab = p_lab_id
+    AND pc.status = 'on_rack'
+    ORDER BY pc.id_copy
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+    INTO v_id_copy;
+
+    IF v_id_copy IS NULL THEN
+        RETURN QUERY SELECT 'unavailable', 'No available copy in this lab', NULL::INTEGER, NULL::DATE;
+        RETURN;
+    END IF;
+
+    INSERT INTO borrowing (id_copy, email, borrow_date, due_date)
+    VALUES (v_id_copy, p_user_email, CURRENT_DATE, CURRENT_DATE + p_loan_days)
+    RETURNING id_borrowing, due_date INTO v_id_borrowing, v_due_date;
+
+    RETURN QUERY SELECT 'borrowed', 'Book borrowed successfully', v_id_borrowing, v_due_date;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test (user@ec-lyon.fr has no access to lab 6, so nothing is written)
+SELECT * FROM borrow_publication('user@ec-lyon.fr', 1, 6);
+
+-- Borrow a cart of publications in one transaction, one result per item
+-- A failing item is rolled back to its savepoint and the others still go through
+CREATE OR REPLACE FUNCTION borrow_publications(
+    p_user_email VARCHAR(255),
+    p_publication_ids INTEGER[],
+    p_lab_ids INTEGER[],
+    p_loan_days INTEGER DEFAULT 14
+)
+RETURNS TABLE (
+    publication_id INTEGER,
+    lab_id INTEGER,
+    outcome TEXT,
+    reason TEXT,
+    id_borrowing INTEGER,
+    due_date DATE
+) AS $$
+#variable_conflict use_column
+BEGIN
+    FOR i IN 1 .. COALESCE(ARRAY_LENGTH(p_publication_ids, 1), 0) LOOP
+        BEGIN
+            RETURN QUERY
+            SELECT p_publication_ids[i], p_lab_ids[i], b.outcome, b.reason, b.id_borrowing, b.due_date
+            FROM borrow_publication(p_user_email, p_publication_ids[i], p_lab_ids[i], p_loan_days) b;
+        EXCEPTION WHEN OTHERS THEN
+            RETURN QUERY SELECT p_publication_ids[i], p_lab_ids[i], 'error', SQLERRM, NULL::INTEGER, NULL::DATE;
+        END;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Test (no access to lab 6, so nothing is written)
+SELECT * FROM borrow_publications('user@ec-lyon.fr', ARRAY[1, 2], ARRAY[6, 6]);
+
+-- Return several borrowings with a single UPDATE, one result per requested id
+-- Non-admins can only return their own borrowings; an id listed again is a duplicate
+CREATE OR REPLACE FUNCTION return_borrowings(
+    p_user_email VARCHAR(255),
+    p_is_admin BOOLEAN,
+    p_borrowing_ids INTEGER[]
+)
+RETURNS TABLE (
+    id_borrowing INTEGER,
+    outcome TEXT,
+    reason TEXT,
+    id_publication INTEGER
+) AS $$
+    WITH requested AS (
+        SELECT id, position, MIN(position) OVER (PARTITION BY id) AS first_position
+        FROM UNNEST(p_borrowing_ids) WITH ORDINALITY AS r(id, position)
+    ),
+    returned AS (
+        UPDATE borrowing b
+        SET return_date = CURRENT_DATE
+        FROM (SELECT DISTINCT id FROM requested) r
+        WHERE b.id_borrowing = r.id
+        AND b.return_date IS NULL
+        AND (p_is_admin OR b.email = p_user_email)
+        RETURNING b.id_borrowing, b.id_copy
+    )
+    SELECT
+        r.id,
+        CASE
+            WHEN r.position <> r.first_position THEN 'duplicate'
+            WHEN ret.id_borrowing IS NOT NULL THEN 'returned'
+            WHEN b.id_borrowing IS NULL OR b.return_date IS NOT NULL THEN 'not_found'
+            ELSE 'forbidden'
+        END,
+        CASE
+            WHEN r.position <> r.first_position THEN 'Borrowing listed more than once in the batch'
+            WHEN ret.id_borrowing IS NOT NULL THEN 'Book returned successfully'
+            WHEN b.id_borrowing IS NULL OR b.return_date IS NOT NULL THEN 'Borrowing not found or already returned'
+            ELSE 'Unauthorized'
+        END,
+        pc.id_publication
+    FROM requested r
+    -- Only the first listing of an id reports the return
+    LEFT JOIN returned ret ON ret.id_borrowing = r.id AND r.position = r.first_position
+    LEFT JOIN borrowing b ON b.id_borrowing = r.id
+    LEFT JOIN publication_copy pc ON ret.id_copy = pc.id_copy
+    ORDER BY r.position;
+$$ LANGUAGE sql;
+
+-- Test (no such borrowing, so nothing is written)
+SELECT * FROM return_borrowings('user@ec-lyon.fr', FALSE, ARRAY[-1]);
+
 -- Get recently added publications (last 30 days)
 CREATE OR REPLACE VIEW recent_publications AS
 SELECT 
@@ -391,13 +592,15 @@ AND b.due_date < CURRENT_DATE
 ORDER BY days_overdue DESC;
 
 -- Statistics view for dashboard
+-- Reads the trigger-maintained counters (see library_counter in create_database.sql)
 CREATE OR REPLACE VIEW library_statistics AS
 SELECT 
-    (SELECT COUNT(*) FROM publication) AS total_publications,
-    (SELECT COUNT(*) FROM publication_copy) AS total_copies,
-    (SELECT COUNT(*) FROM publication_copy WHERE status = 'on_rack') AS available_copies,
-    (SELECT COUNT(*) FROM publication_copy WHERE status = 'issued_to') AS borrowed_copies,
-    (SELECT COUNT(*) FROM publication_copy WHERE status = 'lost') AS lost_copies,
-    (SELECT COUNT(*) FROM library_user WHERE active = true) AS active_users,
-    (SELECT COUNT(*) FROM borrowing WHERE return_date IS NULL) AS active_borrowings,
-    (SELECT COUNT(*) FROM proposed_publication WHERE status = 'pending') AS pending_proposals;
\ No newline at end of file
+    MAX(value) FILTER (WHERE name = 'total_publications') AS total_publications,
+    MAX(value) FILTER (WHERE name = 'total_copies') AS total_copies,
+    MAX(value) FILTER (WHERE name = 'available_copies') AS available_copies,
+    MAX(value) FILTER (WHERE name = 'borrowed_copies') AS borrowed_copies,
+    MAX(value) FILTER (WHERE name = 'lost_copies') AS lost_copies,
+    MAX(value) FILTER (WHERE name = 'active_users') AS active_users,
+    MAX(value) FILTER (WHERE name = 'active_borrowings') AS active_borrowings,
+    MAX(value) FILTER (WHERE name = 'pending_proposals') AS pending_proposals
+FROM library_counter;
\ No newline at end of file
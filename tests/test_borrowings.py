@@ -0,0 +1,94 @@
+"""
+Borrowing endpoint tests (listing, pagination and batch returns)
+Runs against the database configured in .env (make db-reset for the seed data)
+"""
+
+import os
+import sys
+
+import bcrypt
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import app as library_app  # noqa: E402
+
+ADMIN_EMAIL = "pytest-admin@ec-lyon.fr"
+ADMIN_PASSWORD = "pytest-password"
+
+
+def database_available():
+    try:
+        library_app.Database().get_connection().close()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not database_available(), reason="library database not reachable")
+
+
+def run_sql(query, params=None):
+    conn = library_app.Database().get_connection()
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall() if cursor.description else None
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope="module")
+def admin():
+    """A client logged in as a throwaway admin (the role comes from the email)"""
+    hashed = bcrypt.hashpw(ADMIN_PASSWORD.encode(), bcrypt.gensalt(library_app.password_hasher.rounds)).decode()
+    run_sql(
+        "INSERT INTO library.library_user (email, name, hashed_password) VALUES (%s, 'Pytest Admin', %s)",
+        (ADMIN_EMAIL, hashed),
+    )
+    try:
+        with TestClient(library_app.app) as client:
+            response = client.post("/api/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+            assert response.status_code == 200
+            yield client
+    finally:
+        run_sql("DELETE FROM library.library_user WHERE email = %s", (ADMIN_EMAIL,))
+
+
+@pytest.mark.parametrize("params", [{"per_page": 0}, {"per_page": -1}, {"page": 0}, {"page": 1, "per_page": 0}])
+def test_out_of_range_paging_is_rejected(admin, params):
+    assert admin.get("/api/borrowings", params=params).status_code == 422
+
+
+def test_repeated_ids_get_one_result_each(admin):
+    returned = run_sql("SELECT MIN(id_borrowing) FROM library.borrowing WHERE return_date IS NOT NULL")[0]["min"]
+    ids = [returned, -1, returned, -1]
+
+    response = admin.put("/api/borrowings/returns", json={"borrowing_ids": ids})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["id_borrowing"] for r in body["results"]] == ids
+    assert [r["outcome"] for r in body["results"]] == ["not_found", "not_found", "duplicate", "duplicate"]
+    assert body["succeeded"] + body["failed"] == len(ids)
+
+
+def test_columnar_pages_follow_the_same_cursor(admin):
+    plain = admin.get("/api/borrowings", params={"page": 1, "per_page": 3}).json()
+    columnar = admin.get("/api/borrowings", params={"page": 1, "per_page": 3, "columnar": True}).json()
+
+    assert set(columnar) == {"columns", "rows", "pagination"}
+    assert [dict(zip(columnar["columns"], row)) for row in columnar["rows"]] == plain["borrowings"]
+    assert columnar["pagination"] == plain["pagination"]
+
+    cursor = plain["pagination"]["next_cursor"]
+    assert cursor is not None
+    following = admin.get("/api/borrowings", params={"cursor": cursor, "per_page": 3, "columnar": True}).json()
+    expected = admin.get("/api/borrowings", params={"cursor": cursor, "per_page": 3}).json()
+    assert [dict(zip(following["columns"], row)) for row in following["rows"]] == expected["borrowings"]
+
+
+def test_columnar_stream_is_rejected(admin):
+    assert admin.get("/api/borrowings", params={"stream": True, "columnar": True}).status_code == 400
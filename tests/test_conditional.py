@@ -0,0 +1,81 @@
+"""
+ETag revalidation tests for conditional endpoints
+Runs against the database configured in .env (make db-reset for the seed data)
+"""
+
+import os
+import sys
+import time
+
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import app as library_app  # noqa: E402
+
+
+def database_available():
+    try:
+        library_app.Database().get_connection().close()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+pytestmark = [
+    pytest.mark.skipif(not database_available(), reason="library database not reachable"),
+    pytest.mark.skipif(
+        not library_app.cache.enabled or os.getenv("CACHE_LISTEN", "true").lower() != "true",
+        reason="versions are only kept in memory while the cache listener runs",
+    ),
+]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(library_app.app) as client:
+        # Versions are served from memory once the listener has connected
+        assert wait_for(lambda: library_app.data_versions.stamp(["catalog"]) is not None)
+        yield client
+
+
+def test_matching_etag_is_answered_without_a_query(client):
+    etag = client.get("/api/publications", params={"per_page": 2}).headers["ETag"]
+
+    response = client.get(
+        "/api/publications",
+        params={"per_page": 2},
+        headers={"If-None-Match": etag, "X-Debug-Profile": "1"},
+    )
+
+    assert response.status_code == 304
+    assert response.headers["X-Debug-Profile"].startswith("queries=0;")
+
+
+def test_committed_write_changes_the_etag(client):
+    etag = client.get("/api/publications", params={"per_page": 2}).headers["ETag"]
+
+    conn = library_app.Database().get_connection()
+    try:
+        with conn, conn.cursor() as cursor:
+            # A no-op write still bumps the 'copies' version
+            cursor.execute("UPDATE library.lab SET name = name WHERE id_lab = (SELECT MIN(id_lab) FROM library.lab)")
+    finally:
+        conn.close()
+
+    def revalidated():
+        response = client.get("/api/publications", params={"per_page": 2}, headers={"If-None-Match": etag})
+        return response.status_code == 200 and response.headers["ETag"] != etag
+
+    assert wait_for(revalidated)
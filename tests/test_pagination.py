@@ -0,0 +1,78 @@
+"""
+Cursor pagination tests for /api/publications
+Runs against the database configured in .env (make db-reset for the seed data)
+"""
+
+import os
+import sys
+
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import app as library_app  # noqa: E402
+
+
+def database_available():
+    try:
+        library_app.Database().get_connection().close()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not database_available(), reason="library database not reachable")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(library_app.app) as client:
+        yield client
+
+
+def walk_pages(client, **params):
+    """Follow next_cursor from the first page to the last, collecting publication ids."""
+    ids = []
+    cursor = None
+    while True:
+        query = dict(params, per_page=2, include_total=False)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/publications", params=query)
+        assert response.status_code == 200
+        body = response.json()
+        ids += [p["id_publication"] for p in body["publications"]]
+        cursor = body["pagination"]["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("search", ["", "data", "systems", "introduction to", "computer science"])
+def test_cursor_pages_return_each_publication_once(client, search):
+    expected = client.get("/api/publications", params={"search": search, "per_page": 100}).json()
+    expected_ids = [p["id_publication"] for p in expected["publications"]]
+
+    ids = walk_pages(client, search=search)
+
+    assert len(ids) == len(set(ids))
+    assert ids == expected_ids
+
+
+def test_ranked_pages_do_not_expose_the_rank(client):
+    body = client.get("/api/publications", params={"search": "data", "per_page": 1}).json()
+    assert all("rank" not in p for p in body["publications"])
+
+
+def test_title_cursor_is_rejected_for_a_ranked_search(client):
+    title_cursor = library_app.encode_cursor("A title", 1)
+    response = client.get("/api/publications", params={"search": "data", "cursor": title_cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("search", ["", "data"])
+@pytest.mark.parametrize("params", [{"per_page": 0}, {"per_page": -1}, {"page": 0}, {"page": -1}])
+def test_out_of_range_paging_is_rejected(client, search, params):
+    response = client.get("/api/publications", params={"search": search, **params})
+    assert response.status_code == 422